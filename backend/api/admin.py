@@ -0,0 +1,97 @@
+import json
+
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from api.models import RequestProfile
+from recipes.constants import LIST_PER_PAGE
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Раздел профилей запросов."""
+
+    list_display = (
+        'pk',
+        'created',
+        'user',
+        'method',
+        'path',
+        'status_code',
+        'mode',
+        'get_duration',
+        'sql_count'
+    )
+    list_filter = ('mode', 'method', 'status_code')
+    list_per_page = LIST_PER_PAGE
+    search_fields = ('path',)
+    fields = (
+        'created', 'user', 'method', 'path', 'status_code', 'mode',
+        'duration', 'sql_count', 'sql_time', 'get_breakdown',
+        'get_download', 'get_summary', 'get_queries'
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, object=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download),
+                name='api_requestprofile_download'
+            )
+        ] + super().get_urls()
+
+    def download(self, request, pk):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(
+            bytes(profile.data),
+            content_type=(
+                'application/octet-stream'
+                if profile.mode == RequestProfile.CPROFILE
+                else 'application/json'
+            )
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{profile.filename}"'
+        )
+        return response
+
+    @admin.display(description='Время, мс')
+    def get_duration(self, object):
+        return f'{object.duration * 1e3:.1f}'
+
+    @admin.display(description='Разбивка времени, мс')
+    def get_breakdown(self, object):
+        return ', '.join(
+            f'{phase}: {value * 1e3:.1f}'
+            for phase, value in object.breakdown.items()
+        )
+
+    @admin.display(description='Файл профиля')
+    def get_download(self, object):
+        return format_html(
+            '<a href="{}">{}</a>',
+            reverse('admin:api_requestprofile_download', args=(object.pk,)),
+            object.filename
+        )
+
+    @admin.display(description='Сводка')
+    def get_summary(self, object):
+        return format_html('<pre>{}</pre>', object.summary)
+
+    @admin.display(description='SQL-запросы')
+    def get_queries(self, object):
+        return format_html(
+            '<pre>{}</pre>', json.dumps(object.queries, indent=2)
+        )
@@ -0,0 +1,145 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from api.serializers.recipes import RecipeSerializer
+from recipes.constants import BULK_IMAGE_WORKERS
+from recipes.feed import fan_out, run_in_background
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from recipes.signals import recipes_imported
+
+RecipeTag = Recipe.tags.through
+
+_executor = ThreadPoolExecutor(
+    max_workers=BULK_IMAGE_WORKERS, thread_name_prefix='bulk-recipes'
+)
+
+
+def referenced_ids(items, field, key=None):
+    """Целые id из списка field всех рецептов, некорректные пропускаются."""
+    ids = set()
+    for item in items:
+        values = item.get(field) if isinstance(item, dict) else None
+        for value in values if isinstance(values, list) else ():
+            if key is not None:
+                value = value.get(key) if isinstance(value, dict) else None
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                pass
+    return ids
+
+
+class BulkRecipeCreator:
+    """Пакетное создание рецептов автора запроса.
+
+    Теги и ингредиенты всех рецептов загружаются двумя запросами и
+    передаются сериализаторам в контексте. Проверка рецептов, декодирование
+    изображений и их сохранение в хранилище выполняются в пуле потоков без
+    обращений к базе. Корректные рецепты, их теги и ингредиенты вставляются
+    bulk_create в одной транзакции; побочные эффекты выполняются через
+    сигнал recipes_imported, как при импорте. Если вставка не удалась,
+    сохраненные изображения пакета удаляются.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.user = context['request'].user
+        self.field = Recipe._meta.get_field('image')
+
+    def prepare(self, item, context):
+        """Рецепт с сохраненным изображением или ошибки рецепта.
+
+        Ошибка сохранения изображения и любая другая ошибка при обработке
+        одного рецепта попадают в его результат и не прерывают пакет.
+        """
+        try:
+            return self.validate_and_save_image(item, context)
+        except Exception:
+            return None, {
+                'non_field_errors': ['Не удалось обработать рецепт']
+            }
+
+    def validate_and_save_image(self, item, context):
+        serializer = RecipeSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        data = dict(serializer.validated_data)
+        tags = data.pop('tags')
+        ingredients = data.pop('ingredients')
+        image = data.pop('image')
+        recipe = Recipe(author=self.user, **data)
+        try:
+            recipe.image = self.field.storage.save(
+                self.field.generate_filename(recipe, image.name), image,
+                max_length=self.field.max_length
+            )
+        except OSError:
+            return None, {'image': ['Не удалось сохранить изображение']}
+        return (recipe, tags, ingredients), None
+
+    def insert(self, prepared):
+        recipes = [recipe for recipe, _, _ in prepared]
+        connection = connections[router.db_for_write(Recipe)]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.pub_date = timezone.now()
+                recipe.save_base(raw=True)
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe, tags, _ in prepared
+            for tag in tags
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient['id'].id,
+                amount=ingredient['amount']
+            )
+            for recipe, _, ingredients in prepared
+            for ingredient in ingredients
+        )
+        recipes_imported.send(
+            sender=Recipe,
+            recipe_ids=[recipe.id for recipe in recipes],
+            authors=Counter({self.user.id: len(recipes)}),
+            tag_ids={tag.id for _, tags, _ in prepared for tag in tags}
+        )
+        for recipe in recipes:
+            run_in_background(fan_out, recipe.id)
+
+    def run(self, items):
+        """Результаты по рецептам: id созданного рецепта или ошибки."""
+        context = dict(
+            self.context,
+            known_tags=Tag.objects.in_bulk(referenced_ids(items, 'tags')),
+            known_ingredients=Ingredient.objects.in_bulk(
+                referenced_ids(items, 'ingredients', 'id')
+            )
+        )
+        outcomes = list(_executor.map(
+            lambda item: self.prepare(item, context), items
+        ))
+        prepared = [outcome for outcome, _ in outcomes if outcome is not None]
+        if prepared:
+            try:
+                with transaction.atomic():
+                    self.insert(prepared)
+            except Exception:
+                for recipe, _, _ in prepared:
+                    self.field.storage.delete(recipe.image.name)
+                raise
+        results = []
+        for index, (outcome, errors) in enumerate(outcomes):
+            if outcome is None:
+                results.append({'index': index, 'errors': errors})
+            else:
+                recipe = outcome[0]
+                results.append(
+                    {'index': index, 'id': recipe.id, 'name': recipe.name}
+                )
+        return results
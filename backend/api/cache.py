@@ -0,0 +1,110 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+CACHE_ALIAS = 'responses'
+ALL_RECIPES = 'recipes'
+KEY_PARAMS = (
+    'tags', 'author', 'limit', 'offset', 'ordering',
+    'is_favorited', 'is_in_shopping_cart', 'fields', 'omit', 'expand'
+)
+COUNT_PARAMS = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+ALL_USERS = 'users'
+
+
+def recipe_tag(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def author_tag(author_id):
+    return f'author:{author_id}'
+
+
+def slug_tag(slug):
+    return f'tag:{slug}'
+
+
+def relation_tag(kind, user_id):
+    return f'{kind}:{user_id}'
+
+
+class ResponseCache:
+    """Кеш ответов с инвалидацией по тегам.
+
+    Каждому тегу соответствует токен версии в кеше. Запись хранит токены
+    своих тегов, прочитанные до построения данных, и считается устаревшей,
+    если хотя бы один из них изменился. Хранилище задается алиасом CACHES,
+    поэтому подходит любой бэкенд Django: память процесса, файлы или Redis.
+    """
+
+    def __init__(self, alias=CACHE_ALIAS, prefix='rc'):
+        self.alias = alias
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _tag_key(self, tag):
+        return f'{self.prefix}:tag:{tag}'
+
+    def key(self, request, names=KEY_PARAMS, extra=()):
+        """Ключ запроса по нормализованным параметрам."""
+        params = sorted(
+            (name, tuple(sorted(request.query_params.getlist(name))))
+            for name in names if name in request.query_params
+        )
+        raw = f'{request.get_host()}{request.path}{params}{extra}'
+        return f'{self.prefix}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        tag_keys = [self._tag_key(tag) for tag in entry['tags']]
+        tokens = self.cache.get_many(tag_keys)
+        for tag_key, token in zip(tag_keys, entry['tags'].values()):
+            if tokens.get(tag_key) != token:
+                return None
+        return entry['data']
+
+    def tokens(self, tags):
+        """Текущие токены тегов, отсутствующие создаются.
+
+        Токены читаются до построения данных: если тег изменится во время
+        построения, запись сохранится со старым токеном и не будет выдана.
+        """
+        tag_keys = {self._tag_key(tag): tag for tag in tags}
+        tokens = self.cache.get_many(list(tag_keys))
+        missing = [tag_key for tag_key in tag_keys if tag_key not in tokens]
+        for tag_key in missing:
+            self.cache.add(tag_key, uuid.uuid4().hex, None)
+        if missing:
+            tokens.update(self.cache.get_many(missing))
+        return {tag: tokens[tag_key] for tag_key, tag in tag_keys.items()}
+
+    def set(self, key, data, tokens, timeout=DEFAULT_TIMEOUT):
+        """Сохраняет данные с токенами, полученными до их построения."""
+        self.cache.set(key, {'data': data, 'tags': tokens}, timeout)
+
+    def invalidate(self, tags):
+        """Делает устаревшими все записи с указанными тегами."""
+        self.cache.set_many(
+            {self._tag_key(tag): uuid.uuid4().hex for tag in tags}, None
+        )
+
+
+response_cache = ResponseCache()
+
+
+def list_tags(request):
+    """Теги списка рецептов по параметрам запроса для инвалидации."""
+    slugs = request.query_params.getlist('tags')
+    authors = request.query_params.getlist('author')
+    tags = {slug_tag(slug) for slug in slugs}
+    tags.update(author_tag(author) for author in authors)
+    if not slugs and not authors:
+        tags.add(ALL_RECIPES)
+    return tags
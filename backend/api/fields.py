@@ -0,0 +1,114 @@
+class FieldSelection:
+    """Выбор полей ответа по параметрам запроса fields, omit и expand.
+
+    fields - список выводимых полей, вложенные поля задаются через точку
+    (author.username). omit - поля, которые нужно убрать. Если задан fields,
+    связанные объекты из COLLAPSIBLE выводятся как id, пока они не указаны
+    в expand или через вложенные поля.
+    """
+
+    def __init__(self, fields=None, omit=(), expand=()):
+        self.fields = None
+        self.children = {}
+        self.omit = set()
+        self.omit_children = {}
+        self.expand = set(expand)
+        if fields is not None:
+            self.fields = set()
+            for path in fields:
+                name, _, rest = path.partition('.')
+                self.fields.add(name)
+                if rest:
+                    self.children.setdefault(name, []).append(rest)
+        for path in omit:
+            name, _, rest = path.partition('.')
+            if rest:
+                self.omit_children.setdefault(name, []).append(rest)
+            else:
+                self.omit.add(name)
+
+    @staticmethod
+    def split(value):
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    @classmethod
+    def from_request(cls, request):
+        """Выбор полей из запроса или None, если параметры не заданы."""
+        params = request.query_params
+        if not any(name in params for name in ('fields', 'omit', 'expand')):
+            return None
+        fields = params.get('fields')
+        return cls(
+            fields=cls.split(fields) if fields is not None else None,
+            omit=cls.split(params.get('omit', '')),
+            expand=cls.split(params.get('expand', ''))
+        )
+
+    def includes(self, name):
+        return (
+            (self.fields is None or name in self.fields)
+            and name not in self.omit
+        )
+
+    def requested(self, name):
+        """Поле явно указано в fields или expand."""
+        return name not in self.omit and (
+            name in self.expand
+            or (self.fields is not None and name in self.fields)
+        )
+
+    def expanded(self, name):
+        return (
+            self.fields is None or name in self.expand
+            or name in self.children
+        )
+
+    def child(self, name):
+        """Выбор полей для вложенного объекта."""
+        if name not in self.children and name not in self.omit_children:
+            return None
+        return FieldSelection(
+            fields=self.children.get(name),
+            omit=self.omit_children.get(name, ())
+        )
+
+
+class SparseFieldsMixin:
+    """Убирает из сериализатора поля, не выбранные в запросе.
+
+    Выбор полей передается в контексте под ключом selection. Вложенные
+    сериализаторы берут свою часть выбора по пути от корневого. Поля из
+    optional_fields выводятся, только если они явно запрошены.
+    """
+
+    collapsible = {}
+    optional_fields = {}
+
+    def get_selection(self):
+        selection = self.context.get('selection')
+        path = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        for name in reversed(path):
+            if selection is None:
+                return None
+            selection = selection.child(name)
+        return selection
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.get_selection()
+        if selection is None:
+            return fields
+        for name in list(fields):
+            if not selection.includes(name):
+                del fields[name]
+            elif name in self.collapsible and not selection.expanded(name):
+                fields[name] = self.collapsible[name]()
+        for name, field in self.optional_fields.items():
+            if name not in fields and selection.requested(name):
+                fields[name] = field()
+        return fields
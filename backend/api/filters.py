@@ -1,6 +1,9 @@
+from django import forms
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
 from recipes.models import Ingredient, Recipe
+from recipes.tags import tag_choices, tag_ids_by_slug
 
 
 class IngredientSearchFilter(filters.FilterSet):
@@ -13,19 +16,86 @@ class IngredientSearchFilter(filters.FilterSet):
         fields = ('name', )
 
 
+class MultipleIntegerField(forms.TypedMultipleChoiceField):
+    """Несколько целых чисел без перечня допустимых значений."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs['coerce'] = int
+        super().__init__(*args, **kwargs)
+
+    def valid_value(self, value):
+        return str(value).isdigit()
+
+
+class TagSlugField(forms.MultipleChoiceField):
+    """Slug тегов с перечнем из кеша.
+
+    Если в запросе есть slug, которого нет в кеше (тег добавили в другом
+    процессе), перечень один раз загружается из базы до ошибки 400.
+    """
+
+    def validate(self, value):
+        if not set(value) <= tag_ids_by_slug().keys():
+            tag_ids_by_slug(refresh=True)
+        super().validate(value)
+
+
+class TagSlugFilter(filters.Filter):
+    """Фильтр по slug тегов.
+
+    Допустимые slug берутся из кеша, рецепты отбираются подзапросом EXISTS
+    по связям с тегами, поэтому дублей нет и DISTINCT не нужен.
+    """
+
+    field_class = TagSlugField
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('choices', tag_choices)
+        super().__init__(*args, **kwargs)
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        tags = tag_ids_by_slug()
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'),
+            tag_id__in=[tags[slug] for slug in value if slug in tags]
+        )))
+
+
+class AuthorFilter(filters.Filter):
+    """Фильтр по id авторов без проверки по списку авторов.
+
+    Несуществующий или не имеющий рецептов автор дает пустой результат, а
+    не ошибку 400, как прежний AllValuesMultipleFilter.
+    """
+
+    field_class = MultipleIntegerField
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        return queryset.filter(author_id__in=value)
+
+
 class RecipeFilter(filters.FilterSet):
     """Фильтр выборки рецептов по определенным полям."""
 
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = TagSlugFilter()
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
-    author = filters.AllValuesMultipleFilter(field_name='author__id')
+    author = AuthorFilter()
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'popular'),), method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'ordering'
+        )
 
     def get_is_favorited(self, queryset, name, value):
         if value:
@@ -36,3 +106,8 @@ class RecipeFilter(filters.FilterSet):
         if value:
             return queryset.filter(shopping_carts__user=self.request.user.id)
         return queryset
+
+    def get_ordering(self, queryset, name, value):
+        if value == 'popular':
+            return queryset.order_by('-favorites_count', '-pub_date')
+        return queryset
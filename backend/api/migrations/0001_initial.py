@@ -0,0 +1,41 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.TextField(verbose_name='Адрес')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Код ответа')),
+                ('mode', models.CharField(choices=[('cprofile', 'cProfile (pstats)'), ('sampling', 'Сэмплирование (speedscope)')], max_length=10, verbose_name='Профилировщик')),
+                ('duration', models.FloatField(verbose_name='Время, с')),
+                ('sql_count', models.PositiveIntegerField(verbose_name='SQL-запросов')),
+                ('sql_time', models.FloatField(verbose_name='Время SQL, с')),
+                ('breakdown', models.JSONField(default=dict, verbose_name='Разбивка времени')),
+                ('queries', models.JSONField(default=list, verbose_name='SQL-запросы')),
+                ('summary', models.TextField(verbose_name='Сводка')),
+                ('data', models.BinaryField(verbose_name='Профиль')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.routers import (choose_replica, current_replica, is_pinned,
+                              pin_to_primary)
+
+
+class ReplicaReadMixin:
+    """Чтение безопасных запросов с реплики базы данных.
+
+    С реплики читают только действия из replica_actions (по умолчанию
+    список), остальные представление добавляет явно. После успешной записи
+    пользователь на время REPLICA_PIN_SECONDS читает только с основной базы
+    и видит свои изменения.
+    """
+
+    replica_actions = ('list',)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user = request.user
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not (user.is_authenticated and is_pinned(user.pk))
+        ):
+            replica = choose_replica()
+            if replica is not None:
+                self.replica_token = current_replica.set(replica)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'replica_token', None)
+        if token is not None:
+            current_replica.reset(token)
+            self.replica_token = None
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,48 @@
+from django.db import models
+
+from users.models import User
+
+
+class RequestProfile(models.Model):
+    """Модель профиля запроса, снятого по просьбе сотрудника."""
+
+    CPROFILE = 'cprofile'
+    SAMPLING = 'sampling'
+    MODES = (
+        (CPROFILE, 'cProfile (pstats)'),
+        (SAMPLING, 'Сэмплирование (speedscope)'),
+    )
+
+    created = models.DateTimeField('Дата', auto_now_add=True, db_index=True)
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='request_profiles'
+    )
+    method = models.CharField('Метод', max_length=10)
+    path = models.TextField('Адрес')
+    status_code = models.PositiveSmallIntegerField('Код ответа')
+    mode = models.CharField('Профилировщик', max_length=10, choices=MODES)
+    duration = models.FloatField('Время, с')
+    sql_count = models.PositiveIntegerField('SQL-запросов')
+    sql_time = models.FloatField('Время SQL, с')
+    breakdown = models.JSONField('Разбивка времени', default=dict)
+    queries = models.JSONField('SQL-запросы', default=list)
+    summary = models.TextField('Сводка')
+    data = models.BinaryField('Профиль')
+
+    class Meta:
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+        ordering = ('-created',)
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration * 1e3:.0f} мс)'
+
+    @property
+    def filename(self):
+        if self.mode == self.CPROFILE:
+            return f'profile-{self.pk}.prof'
+        return f'profile-{self.pk}.speedscope.json'
@@ -1,7 +1,159 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       LimitOffsetPagination,
+                                       PageNumberPagination)
 
+from api.cache import COUNT_PARAMS, response_cache
+from recipes.constants import APPROXIMATE_COUNT_THRESHOLD, COUNT_CACHE_TIMEOUT
 
-class PageLimitPagination(PageNumberPagination):
+
+def exact_count(queryset):
+    """Число объектов как в LimitOffsetPagination.get_count."""
+    try:
+        return queryset.count()
+    except (AttributeError, TypeError):
+        return len(queryset)
+
+
+def estimated_count(queryset):
+    """Оценка числа строк таблицы по статистике Postgres или None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class CountedPaginator(Paginator):
+    """Paginator, получающий число объектов от пагинатора DRF."""
+
+    def __init__(self, object_list, per_page, get_count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.get_count = get_count
+
+    @cached_property
+    def count(self):
+        return self.get_count(self.object_list)
+
+
+class CachedCountMixin:
+    """Число объектов для пагинации из кеша ответов.
+
+    Представление задает метод count_tags(request) с тегами инвалидации
+    числа; если метода нет или он вернул None, выполняется обычный COUNT.
+    Число кешируется по параметрам фильтров на COUNT_CACHE_TIMEOUT секунд.
+    Для выборок без фильтров на Postgres берется оценка планировщика, если
+    она не меньше APPROXIMATE_COUNT_THRESHOLD.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        count_tags = getattr(self.view, 'count_tags', None)
+        tags = count_tags(self.request) if count_tags is not None else None
+        if tags is None or not isinstance(queryset, QuerySet):
+            return exact_count(queryset)
+        key = response_cache.key(
+            self.request, COUNT_PARAMS, ('count', *sorted(tags))
+        )
+        count = response_cache.get(key)
+        if count is not None:
+            return count
+        tokens = response_cache.tokens(tags)
+        if not queryset.query.where:
+            count = estimated_count(queryset)
+            if count is not None and count < APPROXIMATE_COUNT_THRESHOLD:
+                count = None
+        if count is None:
+            count = exact_count(queryset)
+        response_cache.set(key, count, tokens, COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class CachedLimitOffsetPagination(CachedCountMixin, LimitOffsetPagination):
+    """Пагинатор limit/offset с кешированным числом объектов."""
+
+
+class PageLimitPagination(CachedCountMixin, PageNumberPagination):
     """Пагинатор для запроса limit."""
 
     page_size_query_param = 'limit'
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountedPaginator(object_list, per_page, self.get_count)
+
+
+class FeedPagination(CursorPagination):
+    """Курсорный пагинатор ленты подписок по ключу (pub_date, id рецепта).
+
+    Вместо выборки получает функцию timeline(position, reverse, limit),
+    возвращающую ключи страницы, и отдает их представлению.
+    """
+
+    page_size_query_param = 'limit'
+
+    @staticmethod
+    def encode_position(key):
+        date, recipe_id = key
+        return f'{date.isoformat()} {recipe_id}'
+
+    def decode_position(self, position):
+        date, _, recipe_id = position.rpartition(' ')
+        try:
+            date = parse_datetime(date)
+            recipe_id = int(recipe_id)
+        except ValueError:
+            date = None
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date, recipe_id
+
+    def paginate_queryset(self, timeline, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = None
+        if self.cursor is not None and self.cursor.position is not None:
+            position = self.decode_position(self.cursor.position)
+        keys = timeline(position, reverse, self.page_size + 1)
+        has_more = len(keys) > self.page_size
+        self.page = keys[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.position = position
+        return self.page
+
+    def link(self, reverse, key):
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=reverse,
+            position=self.encode_position(key or self.position)
+        ))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.link(False, self.page[-1] if self.page else None)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.link(True, self.page[0] if self.page else None)
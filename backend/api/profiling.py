@@ -0,0 +1,286 @@
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.models import RequestProfile
+from recipes.constants import (PROFILE_MAX_QUERIES, PROFILE_SAMPLE_INTERVAL,
+                               PROFILE_SUMMARY_LINES)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+# Фаза -> функции (окончание пути файла, имя), время которых к ней относится.
+PHASES = {
+    'serialization': (
+        ('rest_framework/serializers.py', 'data'),
+        ('api/serializers/lean.py', 'build_recipes'),
+        ('api/serializers/lean.py', 'build_tags'),
+        ('api/serializers/lean.py', 'build_ingredients'),
+    ),
+    'rendering': (
+        ('rest_framework/renderers.py', 'render'),
+        ('api/renderers.py', 'render'),
+        ('api/utils.py', 'create_shopping_cart'),
+    ),
+}
+
+
+def phases_of(filename, name):
+    filename = filename.replace('\\', '/')
+    return {
+        phase for phase, functions in PHASES.items()
+        if any(
+            filename.endswith(suffix) and name == function
+            for suffix, function in functions
+        )
+    }
+
+
+class QueryRecorder:
+    """Обертка execute_wrapper, записывающая время SQL-запросов."""
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.time += duration
+            if len(self.queries) < PROFILE_MAX_QUERIES:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'time': duration,
+                })
+
+
+class DeterministicProfiler:
+    """cProfile: сохраняется в формате pstats."""
+
+    mode = RequestProfile.CPROFILE
+
+    def __enter__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        self.profile.create_stats()
+        self.stats = dict(self.profile.stats)
+
+    def data(self):
+        return marshal.dumps(self.stats)
+
+    def summary(self):
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats(
+            'cumulative'
+        ).print_stats(PROFILE_SUMMARY_LINES)
+        return stream.getvalue()
+
+    def phases(self):
+        """Время фаз без двойного учета вложенных вызовов одной фазы."""
+        stats = self.stats
+        result = {}
+        for phase in PHASES:
+            matched = {
+                function for function in stats
+                if phase in phases_of(function[0], function[2])
+            }
+            result[phase] = sum(
+                stats[function][3] - sum(
+                    caller_stats[3]
+                    for caller, caller_stats in stats[function][4].items()
+                    if caller in matched
+                )
+                for function in matched
+            )
+        return result
+
+
+class SamplingProfiler(threading.Thread):
+    """Сэмплирующий профилировщик: сохраняется в формате speedscope.
+
+    Отдельный поток с интервалом PROFILE_SAMPLE_INTERVAL снимает стек
+    потока запроса через sys._current_frames. На время профилирования
+    интервал переключения GIL уменьшается, чтобы поток успевал снимать
+    стеки.
+    """
+
+    mode = RequestProfile.SAMPLING
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.target = threading.get_ident()
+        self.frames = {}
+        self.samples = []
+        self.weights = []
+        self.stopped = threading.Event()
+
+    def __enter__(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(PROFILE_SAMPLE_INTERVAL / 5)
+        self.started = time.perf_counter()
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+        self.duration = time.perf_counter() - self.started
+        sys.setswitchinterval(self.switch_interval)
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(PROFILE_SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.target)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                stack.append(self.frames.setdefault(key, len(self.frames)))
+                frame = frame.f_back
+            if not stack:
+                continue
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def data(self):
+        return json.dumps({
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [
+                {'name': name, 'file': filename, 'line': line}
+                for name, filename, line in self.frames
+            ]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': 'request',
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.duration,
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+        }).encode()
+
+    def summary(self):
+        frames = list(self.frames)
+        own = Counter()
+        total = Counter()
+        for stack, weight in zip(self.samples, self.weights):
+            if stack:
+                own[stack[-1]] += weight
+            for index in set(stack):
+                total[index] += weight
+        lines = [f'{len(self.samples)} samples, {self.duration:.3f} s']
+        lines.append(f'{"own, s":>10} {"total, s":>10}  function')
+        for index, weight in total.most_common(PROFILE_SUMMARY_LINES):
+            name, filename, line = frames[index]
+            lines.append(
+                f'{own[index]:10.4f} {weight:10.4f}  '
+                f'{filename}:{line}({name})'
+            )
+        return '\n'.join(lines)
+
+    def phases(self):
+        frame_phases = {
+            index: phases_of(filename, name)
+            for (name, filename, _), index in self.frames.items()
+        }
+        result = dict.fromkeys(PHASES, 0.0)
+        for stack, weight in zip(self.samples, self.weights):
+            for phase in set().union(*(frame_phases[i] for i in stack)):
+                result[phase] += weight
+        return result
+
+
+def staff_user(request):
+    """Сотрудник из сессии или токена запроса, иначе None."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        user = result[0] if result else None
+    if user is not None and user.is_active and user.is_staff:
+        return user
+    return None
+
+
+class ProfilingMiddleware:
+    """Профилирование запроса по просьбе сотрудника.
+
+    Включается заголовком X-Profile или параметром _profile со значением
+    cprofile или sampling. Профиль, время SQL-запросов и разбивка времени
+    по фазам (фазы включают выполненные в них SQL-запросы) сохраняются в
+    RequestProfile, id профиля возвращается в заголовке X-Profile-Id.
+    Запросы без заголовка и параметра обрабатываются без изменений.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = (
+            request.META.get(PROFILE_HEADER)
+            or request.GET.get(PROFILE_PARAM)
+        )
+        if not mode:
+            return self.get_response(request)
+        user = staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user, mode)
+
+    def profile(self, request, user, mode):
+        recorder = QueryRecorder()
+        profiler = (
+            SamplingProfiler() if mode == RequestProfile.SAMPLING
+            else DeterministicProfiler()
+        )
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            started = time.perf_counter()
+            with profiler:
+                response = self.get_response(request)
+            duration = time.perf_counter() - started
+        profile = RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path(),
+            status_code=response.status_code,
+            mode=profiler.mode,
+            duration=duration,
+            sql_count=recorder.count,
+            sql_time=recorder.time,
+            breakdown={
+                'total': duration, 'sql': recorder.time, **profiler.phases()
+            },
+            queries=recorder.queries,
+            summary=profiler.summary(),
+            data=profiler.data(),
+        )
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
@@ -0,0 +1,175 @@
+"""Быстрое построение ответов для списков рецептов, тегов и ингредиентов.
+
+Данные выбираются через values() фиксированным числом запросов и
+собираются в словари в том же виде и порядке ключей, что и у
+RecipeGETSerializer, TagSerializer и IngredientSerializer. Поля, не
+выбранные параметрами fields и omit, не запрашиваются из базы.
+"""
+from api.fields import FieldSelection
+from recipes.models import IngredientRecipe, Recipe
+from recipes.relations import relation_cache
+from users.models import User
+
+RECIPE_FIELDS = ('id', 'name', 'image', 'text', 'cooking_time', 'author_id')
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+AUTHOR_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+AUTHOR_OPTIONAL_FIELDS = ('recipes_count',)
+RECIPE_OUTPUT = (
+    'id', 'tags', 'author', 'ingredients', 'is_favorited',
+    'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time'
+)
+RECIPE_TAG_FIELDS = {
+    'id': 'tag__id',
+    'name': 'tag__name',
+    'color': 'tag__color',
+    'slug': 'tag__slug',
+}
+RECIPE_INGREDIENT_FIELDS = {
+    'id': 'ingredient__id',
+    'name': 'ingredient__name',
+    'measurement_unit': 'ingredient__measurement_unit',
+    'amount': 'amount',
+}
+IMAGE_STORAGE = Recipe._meta.get_field('image').storage
+
+
+def recipe_row(recipe):
+    """Строка values() для уже загруженного объекта рецепта."""
+    row = {field: getattr(recipe, field) for field in RECIPE_FIELDS}
+    row['image'] = recipe.image.name
+    return row
+
+
+def image_url(name, request):
+    if not name:
+        return None
+    url = IMAGE_STORAGE.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def group_rows(queryset, fields):
+    """Группирует связанные строки по recipe_id в порядке выборки."""
+    grouped = {}
+    for row in queryset.values('recipe_id', *fields.values()):
+        grouped.setdefault(row['recipe_id'], []).append(
+            {key: row[source] for key, source in fields.items()}
+        )
+    return grouped
+
+
+def recipe_fields(selection=None):
+    """Столбцы values() для выбранных полей рецепта."""
+    selection = selection or FieldSelection()
+    return ('id',) + tuple(
+        field for field in RECIPE_FIELDS[1:]
+        if selection.includes(
+            'author' if field == 'author_id' else field
+        )
+    )
+
+
+def selected(fields, selection):
+    if selection is None:
+        return fields
+    return {
+        key: source for key, source in fields.items()
+        if selection.includes(key)
+    }
+
+
+def build_authors(author_ids, request, selection):
+    """Авторы рецептов по id с выбранными полями."""
+    fields = tuple(selected(dict.fromkeys(AUTHOR_FIELDS), selection))
+    optional = tuple(
+        field for field in AUTHOR_OPTIONAL_FIELDS
+        if selection is not None and selection.requested(field)
+    )
+    rows = User.objects.filter(id__in=author_ids).values(
+        'id', *(field for field in fields if field != 'id'), *optional
+    )
+    subscribed = selection is None or selection.includes('is_subscribed')
+    relations = relation_cache.for_request(request) if subscribed else None
+    authors = {}
+    for row in rows:
+        author = {field: row[field] for field in fields}
+        if subscribed:
+            author['is_subscribed'] = (
+                relations is not None
+                and relations.contains('subscriptions', row['id'])
+            )
+        for field in optional:
+            author[field] = row[field]
+        authors[row['id']] = author
+    return authors
+
+
+def build_recipes(rows, request, selection=None):
+    """Ответ RecipeGETSerializer для строк values(*RECIPE_FIELDS).
+
+    Запросы для связанных данных выполняются только для выбранных полей.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    selection = selection or FieldSelection()
+    output = [name for name in RECIPE_OUTPUT if selection.includes(name)]
+    recipe_ids = [row['id'] for row in rows]
+    getters = {
+        'id': lambda row: row['id'],
+        'name': lambda row: row['name'],
+        'image': lambda row: image_url(row['image'], request),
+        'text': lambda row: row['text'],
+        'cooking_time': lambda row: row['cooking_time'],
+    }
+    if 'author' in output and selection.expanded('author'):
+        authors = build_authors(
+            {row['author_id'] for row in rows}, request,
+            selection.child('author')
+        )
+        getters['author'] = lambda row: dict(authors[row['author_id']])
+    elif 'author' in output:
+        getters['author'] = lambda row: row['author_id']
+    if 'tags' in output:
+        through = Recipe.tags.through.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('tag__name')
+        if selection.expanded('tags'):
+            tags = group_rows(
+                through, selected(RECIPE_TAG_FIELDS, selection.child('tags'))
+            )
+            getters['tags'] = lambda row: tags.get(row['id'], [])
+        else:
+            tags = group_rows(through, {'id': 'tag_id'})
+            getters['tags'] = lambda row: [
+                tag['id'] for tag in tags.get(row['id'], ())
+            ]
+    if 'ingredients' in output:
+        ingredients = group_rows(
+            IngredientRecipe.objects.filter(
+                recipe_id__in=recipe_ids
+            ).order_by('ingredient__name'),
+            selected(RECIPE_INGREDIENT_FIELDS, selection.child('ingredients'))
+        )
+        getters['ingredients'] = lambda row: ingredients.get(row['id'], [])
+    relations = None
+    if {'is_favorited', 'is_in_shopping_cart'} & set(output):
+        relations = relation_cache.for_request(request)
+    for name, kind in (
+        ('is_favorited', 'favorites'), ('is_in_shopping_cart', 'shopping_cart')
+    ):
+        if name in output:
+            getters[name] = lambda row, kind=kind: (
+                relations is not None and relations.contains(kind, row['id'])
+            )
+    return [{name: getters[name](row) for name in output} for row in rows]
+
+
+def build_tags(queryset):
+    return list(queryset.values(*TAG_FIELDS))
+
+
+def build_ingredients(queryset):
+    return list(queryset.values(*INGREDIENT_FIELDS))
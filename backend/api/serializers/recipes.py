@@ -1,15 +1,26 @@
 from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 
+from api.fields import SparseFieldsMixin
 from api.serializers.users import UserGETSerializer
 from recipes.constants import MAX_INGREDIENT, MIN_INGREDIENT
-from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from recipes.relations import relation_cache
+from recipes.signals import composition_changed
 
 
-class TagSerializer(serializers.ModelSerializer):
+DOES_NOT_EXIST = serializers.PrimaryKeyRelatedField.default_error_messages[
+    'does_not_exist'
+]
+
+
+def does_not_exist(pk):
+    """Сообщение об ошибке в формате PrimaryKeyRelatedField."""
+    return str(DOES_NOT_EXIST).format(pk_value=pk)
+
+
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели Tag."""
 
     class Meta:
@@ -28,7 +39,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 class IngredientRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор создания объектов для модели IngredientRecipe."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
 
     class Meta:
         model = IngredientRecipe
@@ -48,7 +59,8 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         return data
 
 
-class IngredientFullSerializer(serializers.ModelSerializer):
+class IngredientFullSerializer(SparseFieldsMixin,
+                               serializers.ModelSerializer):
     """Сериализатор для модели IngredientRecipe."""
 
     id = serializers.ReadOnlyField(source="ingredient.id")
@@ -67,9 +79,16 @@ class IngredientFullSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeGETSerializer(serializers.ModelSerializer):
+class RecipeGETSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор модели Recipe для GET запросов."""
 
+    collapsible = {
+        'author': lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+        'tags': lambda: serializers.PrimaryKeyRelatedField(
+            many=True, read_only=True
+        ),
+    }
+
     tags = TagSerializer(many=True, read_only=True)
     author = UserGETSerializer(read_only=True)
     ingredients = IngredientFullSerializer(
@@ -95,25 +114,50 @@ class RecipeGETSerializer(serializers.ModelSerializer):
 
     def get_is_favorited(self, object):
         """Проверка добавления рецепта в избранное."""
-        request = self.context.get('request')
+        relations = relation_cache.for_request(self.context.get('request'))
         return (
-            request is not None and request.user.is_authenticated
-            and request.user.favoritings.filter(recipe=object).exists()
+            relations is not None
+            and relations.contains('favorites', object.id)
         )
 
     def get_is_in_shopping_cart(self, object):
         """Проверка добавления рецепта в список покупок."""
-        request = self.context.get('request')
+        relations = relation_cache.for_request(self.context.get('request'))
         return (
-            request is not None and request.user.is_authenticated
-            and request.user.shopping_carts.filter(recipe=object).exists()
+            relations is not None
+            and relations.contains('shopping_cart', object.id)
         )
 
 
+class RecipeMatchSerializer(RecipeGETSerializer):
+    """Сериализатор рецептов, подобранных по ингредиентам."""
+
+    matched_ingredients = serializers.IntegerField(read_only=True)
+    missing_ingredients = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeGETSerializer.Meta):
+        fields = RecipeGETSerializer.Meta.fields + (
+            'matched_ingredients',
+            'missing_ingredients'
+        )
+
+
+class RecipeSimilarSerializer(RecipeGETSerializer):
+    """Сериализатор похожих рецептов."""
+
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeGETSerializer.Meta):
+        fields = RecipeGETSerializer.Meta.fields + ('similarity',)
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор модели Recipe для небезопасных запросов."""
 
     ingredients = IngredientRecipeSerializer(many=True)
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
     image = Base64ImageField()
     author = UserGETSerializer(read_only=True)
 
@@ -146,18 +190,48 @@ class RecipeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Нужно указать минимум 1 тег'
             )
-        if not data.get('image'):
+        if self.instance is None and not data.get('image'):
             raise serializers.ValidationError(
                 'Нужно добавить изображение'
             )
         return data
 
+    def validate_ingredients(self, ingredients):
+        """Проверка всех ингредиентов рецепта одним запросом.
+
+        При пакетном создании ингредиенты всех рецептов загружаются заранее
+        и передаются в контексте как known_ingredients.
+        """
+        found = self.context.get('known_ingredients')
+        if found is None:
+            found = Ingredient.objects.in_bulk(
+                [ingredient.get('id') for ingredient in ingredients]
+            )
+        errors = [
+            {} if ingredient.get('id') in found
+            else {'id': [does_not_exist(ingredient.get('id'))]}
+            for ingredient in ingredients
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        for ingredient in ingredients:
+            ingredient['id'] = found[ingredient.get('id')]
+        return ingredients
+
     def validate_tags(self, tags):
         if len(tags) != len(set(tags)):
             raise serializers.ValidationError(
                 'Теги рецепта должны быть уникальными'
             )
-        return tags
+        found = self.context.get('known_tags')
+        if found is None:
+            found = Tag.objects.in_bulk(tags)
+        missing = [tag for tag in tags if tag not in found]
+        if missing:
+            raise serializers.ValidationError(
+                [does_not_exist(tag) for tag in missing]
+            )
+        return [found[tag] for tag in tags]
 
     @staticmethod
     def add_ingredients(ingredients_data, recipe):
@@ -178,26 +252,89 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         recipe.tags.set(tags)
         self.add_ingredients(ingredients, recipe)
+        composition_changed.send(sender=Recipe, recipe=recipe)
         return recipe
 
+    @staticmethod
+    def update_ingredients(ingredients_data, recipe):
+        """Изменяет только отличающиеся строки IngredientRecipe.
+
+        Возвращает True, если состав ингредиентов изменился.
+        """
+        current = {
+            ingredient_recipe.ingredient_id: ingredient_recipe
+            for ingredient_recipe in recipe.ingredient_recipes.all()
+        }
+        to_create = []
+        to_update = []
+        for ingredient in ingredients_data:
+            ingredient_recipe = current.pop(ingredient.get('id').id, None)
+            if ingredient_recipe is None:
+                to_create.append(ingredient)
+            elif ingredient_recipe.amount != ingredient.get('amount'):
+                ingredient_recipe.amount = ingredient.get('amount')
+                to_update.append(ingredient_recipe)
+        if current:
+            IngredientRecipe.objects.filter(
+                id__in=[obj.id for obj in current.values()]
+            ).delete()
+        if to_update:
+            IngredientRecipe.objects.bulk_update(to_update, ('amount',))
+        if to_create:
+            RecipeSerializer.add_ingredients(to_create, recipe)
+        return bool(current or to_update or to_create)
+
+    @staticmethod
+    def update_tags(tags, recipe):
+        """Изменяет теги, если они отличаются, и возвращает True."""
+        if {tag.id for tag in recipe.tags.all()} == {tag.id for tag in tags}:
+            return False
+        recipe.tags.set(tags)
+        return True
+
+    @staticmethod
+    def is_same_image(instance, image):
+        """Проверка совпадения загруженного изображения с сохраненным."""
+        if not instance.image:
+            return False
+        try:
+            if instance.image.size != image.size:
+                return False
+            with instance.image.open('rb') as stored:
+                return stored.read() == image.read()
+        except OSError:
+            return False
+        finally:
+            image.seek(0)
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        recipe = instance
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        instance.tags.clear()
-        instance.tags.set(tags)
-        instance.ingredients.clear()
-        self.add_ingredients(ingredients, recipe)
-        return super().update(instance, validated_data)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        changed = tags is not None and self.update_tags(tags, instance)
+        if ingredients is not None:
+            changed = self.update_ingredients(ingredients, instance) or changed
+        if changed:
+            composition_changed.send(sender=Recipe, recipe=instance)
+        image = validated_data.pop('image', None)
+        if image is not None and not self.is_same_image(instance, image):
+            validated_data['image'] = image
+        changed_fields = [
+            field for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in changed_fields:
+            setattr(instance, field, validated_data[field])
+        if changed_fields:
+            instance.save(update_fields=changed_fields)
+        return instance
 
     def to_representation(self, recipe):
-        request = self.context.get('request')
-        serializer = RecipeGETSerializer(recipe, context={'request': request})
+        serializer = RecipeGETSerializer(recipe, context=self.context)
         return serializer.data
 
 
-class RecipeShortSerializer(serializers.ModelSerializer):
+class RecipeShortSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для компактного отображения рецептов."""
 
     class Meta:
@@ -208,63 +345,3 @@ class RecipeShortSerializer(serializers.ModelSerializer):
             'image',
             'cooking_time'
         )
-
-
-class FavoriteSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Favorite и ShoppingCart."""
-
-    class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Favorite.objects.all(),
-                fields=('user', 'recipe'),
-                message='Вы уже добавляли это рецепт в избранное'
-            )
-        ]
-
-    def validate(self, data):
-        recipe = data.get('recipe')
-        if not Recipe.objects.filter(id=recipe.id).exists():
-            raise serializers.ValidationError(
-                'Рецепт не найден'
-            )
-        return data
-
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        serializer = RecipeShortSerializer(
-            instance.recipe, context={'request': request}
-        )
-        return serializer.data
-
-
-class ShoppingCartSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели ShoppingCart."""
-
-    class Meta:
-        model = ShoppingCart
-        fields = ('user', 'recipe')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=ShoppingCart.objects.all(),
-                fields=('user', 'recipe'),
-                message='Вы уже добавляли это рецепт в список покупок'
-            )
-        ]
-
-    def validate(self, data):
-        recipe = data.get('recipe')
-        if not Recipe.objects.filter(id=recipe.id).exists():
-            raise serializers.ValidationError(
-                'Рецепт не найден'
-            )
-        return data
-
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        serializer = RecipeShortSerializer(
-            instance.recipe, context={'request': request}
-        )
-        return serializer.data
@@ -1,8 +1,9 @@
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 
-from users.models import Subscribe, User
+from api.fields import SparseFieldsMixin
+from recipes.relations import relation_cache
+from users.models import User
 
 
 class UserForCreateSerializer(UserCreateSerializer):
@@ -36,10 +37,13 @@ class UserForCreateSerializer(UserCreateSerializer):
         return data
 
 
-class UserGETSerializer(UserSerializer):
+class UserGETSerializer(SparseFieldsMixin, UserSerializer):
     """Сериализатор для модели User."""
 
     is_subscribed = serializers.SerializerMethodField(read_only=True)
+    optional_fields = {
+        'recipes_count': serializers.ReadOnlyField,
+    }
 
     class Meta:
         model = User
@@ -60,10 +64,12 @@ class UserGETSerializer(UserSerializer):
 
     def get_is_subscribed(self, object):
         """Проверка подписки пользователя на автора."""
-        request = self.context.get('request')
+        if hasattr(object, 'is_subscribed'):
+            return object.is_subscribed
+        relations = relation_cache.for_request(self.context.get('request'))
         return (
-            request is not None and request.user.is_authenticated
-            and object.authors.filter(subscriber=request.user).exists()
+            relations is not None
+            and relations.contains('subscriptions', object.id)
         )
 
 
@@ -71,7 +77,7 @@ class SubscribeShowSerializer(UserGETSerializer):
     """Сериализатор отображения подписок."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta(UserGETSerializer):
         model = User
@@ -84,39 +90,9 @@ class SubscribeShowSerializer(UserGETSerializer):
         recipes = object.recipes.all()
         if limit and limit.isdigit():
             recipes = recipes[:int(limit)]
-        request = self.context.get('request')
-        serializer = RecipeShortSerializer(
-            recipes, many=True, context={'request': request}
-        )
+        selection = self.get_selection()
+        serializer = RecipeShortSerializer(recipes, many=True, context={
+            'request': request,
+            'selection': selection.child('recipes') if selection else None
+        })
         return serializer.data
-
-    def get_recipes_count(self, object):
-        return object.recipes.count()
-
-
-class SubscribeSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Subscribe."""
-
-    class Meta:
-        model = Subscribe
-        fields = ('author', 'subscriber')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Subscribe.objects.all(),
-                fields=('author', 'subscriber'),
-                message='Вы уже подписывались на этого автора'
-            )
-        ]
-
-    def validate(self, data):
-        if data['subscriber'] == data['author']:
-            raise serializers.ValidationError(
-                'Нельзя подписаться на себя'
-            )
-        return data
-
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        return SubscribeShowSerializer(
-            instance.author, context={'request': request}
-        ).data
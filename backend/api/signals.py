@@ -0,0 +1,158 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from api.cache import (ALL_RECIPES, ALL_USERS, author_tag, recipe_tag,
+                       relation_tag, response_cache, slug_tag)
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.signals import composition_changed, recipes_imported
+from users.models import Subscribe, User
+
+# Поля пользователя, которые выводятся в рецептах как автор.
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+
+
+def invalidate_on_commit(tags):
+    transaction.on_commit(lambda: response_cache.invalidate(tags))
+
+
+def recipe_tags(recipe_ids):
+    return {recipe_tag(recipe_id) for recipe_id in recipe_ids}
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    tags = {recipe_tag(instance.id)}
+    if created:
+        tags.update((ALL_RECIPES, author_tag(instance.author_id)))
+    invalidate_on_commit(tags)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    tags = {
+        recipe_tag(instance.id), ALL_RECIPES, author_tag(instance.author_id)
+    }
+    tags.update(
+        slug_tag(slug)
+        for slug in instance.tags.values_list('slug', flat=True)
+    )
+    invalidate_on_commit(tags)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse or action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    tags = instance.tags.all() if action == 'pre_clear' else (
+        Tag.objects.filter(id__in=pk_set)
+    )
+    invalidate_on_commit(
+        {recipe_tag(instance.id), ALL_RECIPES}
+        | {slug_tag(slug) for slug in tags.values_list('slug', flat=True)}
+    )
+
+
+@receiver(composition_changed, sender=Recipe)
+def recipe_composition_changed(sender, recipe, **kwargs):
+    tags = {recipe_tag(recipe.id), ALL_RECIPES, author_tag(recipe.author_id)}
+    tags.update(
+        slug_tag(slug) for slug in recipe.tags.values_list('slug', flat=True)
+    )
+    invalidate_on_commit(tags)
+
+
+@receiver(recipes_imported, sender=Recipe)
+def recipes_imported_handler(sender, authors, tag_ids, **kwargs):
+    tags = {ALL_RECIPES}
+    tags.update(author_tag(author_id) for author_id in authors)
+    tags.update(
+        slug_tag(slug) for slug in Tag.objects.filter(
+            id__in=tag_ids
+        ).values_list('slug', flat=True)
+    )
+    invalidate_on_commit(tags)
+
+
+@receiver(pre_save, sender=Tag)
+def tag_pre_save(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._old_slug = Tag.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    tags = recipe_tags(Recipe.tags.through.objects.filter(
+        tag_id=instance.id
+    ).values_list('recipe_id', flat=True))
+    tags.add(slug_tag(instance.slug))
+    old_slug = getattr(instance, '_old_slug', None)
+    if old_slug is not None:
+        tags.add(slug_tag(old_slug))
+    invalidate_on_commit(tags)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    invalidate_on_commit(recipe_tags(IngredientRecipe.objects.filter(
+        ingredient_id=instance.id
+    ).values_list('recipe_id', flat=True)))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        invalidate_on_commit({ALL_USERS})
+    elif update_fields is None or AUTHOR_FIELDS.intersection(update_fields):
+        tags = recipe_tags(Recipe.objects.filter(
+            author_id=instance.id
+        ).values_list('id', flat=True))
+        tags.add(author_tag(instance.id))
+        invalidate_on_commit(tags)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_on_commit({ALL_USERS})
+
+
+def relation_owners(instance, field):
+    """Владелец связи и прежний владелец, если строку переназначили."""
+    owners = {getattr(instance, field)}
+    moved = getattr(instance, '_moved', {})
+    if field in moved:
+        owners.add(moved[field])
+    return owners
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    invalidate_on_commit({
+        relation_tag('is_favorited', user_id)
+        for user_id in relation_owners(instance, 'user_id')
+    })
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    invalidate_on_commit({
+        relation_tag('is_in_shopping_cart', user_id)
+        for user_id in relation_owners(instance, 'user_id')
+    })
+
+
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def subscribe_changed(sender, instance, **kwargs):
+    invalidate_on_commit({
+        relation_tag('subscriptions', user_id)
+        for user_id in relation_owners(instance, 'subscriber_id')
+    })
@@ -0,0 +1,86 @@
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Ограничение запросов по скользящему окну.
+
+    Частота из DEFAULT_THROTTLE_RATES задает число условных запросов за
+    окно. Запрос стоит столько, сколько указано для действия в атрибуте
+    throttle_costs представления (по умолчанию 1). Счетчики хранятся в кеше
+    throttle по фиксированным окнам; число запросов за последнее окно
+    оценивается как счетчик текущего окна плюс доля счетчика предыдущего.
+    Стоимость запроса сначала прибавляется атомарным incr и возвращается
+    decr, если лимит превышен, поэтому одновременные запросы не могут
+    вместе превысить лимит. Лимиты общие для процессов, если для кеша
+    throttle настроен бэкенд с атомарным incr (Memcached или Redis).
+    """
+
+    cache = caches['throttle']
+    cache_format = 'window_%(scope)s_%(ident)s'
+
+    def get_cost(self, view):
+        costs = getattr(view, 'throttle_costs', {})
+        cost = costs.get(getattr(view, 'action', None), 1)
+        return min(cost, self.num_requests)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        cost = self.get_cost(view)
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        elapsed /= self.duration
+        current_key = f'{self.key}_{int(window)}'
+        self.cache.add(current_key, 0, 2 * self.duration)
+        try:
+            used = self.cache.incr(current_key, cost)
+        except ValueError:
+            used = cost
+            self.cache.set(current_key, used, 2 * self.duration)
+        previous = self.cache.get(f'{self.key}_{int(window) - 1}', 0)
+        if previous * (1 - elapsed) + used <= self.num_requests:
+            self.retry_after = 0
+            return True
+        self.cache.decr(current_key, cost)
+        self.retry_after = self.get_retry_after(
+            previous, used - cost, cost, elapsed
+        )
+        return False
+
+    def get_retry_after(self, previous, used, cost, elapsed):
+        """Время до момента, когда запрос со стоимостью cost пройдет."""
+        free = self.num_requests - used - cost
+        if free < 0 or not previous:
+            return (1 - elapsed) * self.duration
+        return max(0, 1 - free / previous - elapsed) * self.duration
+
+    def wait(self):
+        return self.retry_after
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottle):
+    """Скользящее окно для каждого авторизованного пользователя."""
+
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            'scope': self.scope, 'ident': request.user.pk
+        }
+
+
+class IPSlidingWindowThrottle(SlidingWindowThrottle):
+    """Скользящее окно для каждого IP адреса."""
+
+    scope = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
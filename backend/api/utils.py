@@ -1,25 +1,55 @@
 import io
+from functools import lru_cache
 
+from django.db.models import Sum
 from django.http import HttpResponse
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+
+from recipes.models import IngredientRecipe
+
+FONT_NAME = 'Arial'
+FONT_PATH = 'data/arial.ttf'
+
+
+@lru_cache(maxsize=None)
+def pdf_canvas():
+    """Модуль canvas reportlab с зарегистрированным шрифтом.
+
+    reportlab нужен только для списка покупок, поэтому импортируется при
+    первом вызове, а файл шрифта разбирается один раз на процесс. Под
+    gunicorn функция вызывается в мастер-процессе до запуска воркеров.
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH, 'UTF-8'))
+    return canvas
+
+
+def shopping_cart_ingredients(user):
+    """Суммы ингредиентов из списка покупок пользователя."""
+    return IngredientRecipe.objects.filter(
+        recipe__shopping_carts__user=user
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+    ).order_by(
+        'ingredient__name'
+    ).annotate(ingredient_value=Sum('amount'))
 
 
 def create_shopping_cart(ingredients_cart):
     """Функция для формирования списка покупок."""
+    canvas = pdf_canvas()
     response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = (
         "attachment; filename='shopping_cart.pdf'"
     )
-    pdfmetrics.registerFont(
-        TTFont('Arial', 'data/arial.ttf', 'UTF-8')
-    )
     buffer = io.BytesIO()
     pdf_file = canvas.Canvas(buffer)
-    pdf_file.setFont('Arial', 24)
+    pdf_file.setFont(FONT_NAME, 24)
     pdf_file.drawString(200, 800, 'Список покупок.')
-    pdf_file.setFont('Arial', 14)
+    pdf_file.setFont(FONT_NAME, 14)
     from_bottom = 750
     for number, ingredient in enumerate(ingredients_cart, start=1):
         pdf_file.drawString(
@@ -33,7 +63,7 @@ def create_shopping_cart(ingredients_cart):
         if from_bottom <= 50:
             from_bottom = 800
             pdf_file.showPage()
-            pdf_file.setFont('Arial', 14)
+            pdf_file.setFont(FONT_NAME, 14)
     pdf_file.showPage()
     pdf_file.save()
     pdf = buffer.getvalue()
@@ -1,44 +1,79 @@
-from django.db.models import Sum
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
+from api.bulk import BulkRecipeCreator
+from api.cache import (ALL_RECIPES, list_tags, recipe_tag, relation_tag,
+                       response_cache, slug_tag)
+from api.fields import FieldSelection
 from api.filters import IngredientSearchFilter, RecipeFilter
+from api.mixins import ReplicaReadMixin
+from api.pagination import CachedLimitOffsetPagination, FeedPagination
 from api.permissions import AuthorOrReadOnly
-from api.serializers.recipes import (FavoriteSerializer, IngredientSerializer,
-                                     RecipeGETSerializer, RecipeSerializer,
-                                     ShoppingCartSerializer, TagSerializer)
-from api.utils import create_shopping_cart
-from recipes.models import (
-    Favorite, Ingredient, IngredientRecipe, Recipe, ShoppingCart, Tag
-)
+from api.renderers import FastJSONRenderer
+from api.serializers.lean import (build_ingredients, build_recipes,
+                                  build_tags, recipe_fields, recipe_row)
+from api.serializers.recipes import (IngredientSerializer,
+                                     RecipeGETSerializer,
+                                     RecipeMatchSerializer, RecipeSerializer,
+                                     RecipeShortSerializer,
+                                     RecipeSimilarSerializer, TagSerializer)
+from api.utils import create_shopping_cart, shopping_cart_ingredients
+from recipes.constants import (BULK_RECIPES_MAX, SIMILAR_RECIPES_LIMIT,
+                               SIMILAR_RECIPES_MAX_LIMIT)
+from recipes.feed import feed_timeline
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.ndjson import export_recipes
+from recipes.similarity import find_similar
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет модели Tag."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny,)
+    replica_actions = ('list', 'retrieve')
     pagination_class = None
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().list(request, *args, **kwargs)
+        return Response(build_tags(self.filter_queryset(self.get_queryset())))
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет модели Ingredient."""
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny,)
+    replica_actions = ('list', 'retrieve')
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientSearchFilter
     search_fields = ('^name',)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            build_ingredients(self.filter_queryset(self.get_queryset()))
+        )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Вьюсет модели Recipe."""
 
     queryset = Recipe.objects.all()
@@ -48,25 +83,178 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedLimitOffsetPagination
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    replica_actions = ('list', 'trending')
+    throttle_costs = {
+        'create': 10,
+        'bulk': 50,
+        'update': 10,
+        'partial_update': 10,
+        'download_shopping_cart': 20,
+        'by_ingredients': 3,
+        'similar': 3,
+        'feed': 2,
+    }
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeGETSerializer
         return RecipeSerializer
 
-    def perform_action(self, serializer_class, user, pk):
-        serializer = serializer_class(
-            data={'user': user.id, 'recipe': pk},
-            context={'request': self.request}
+    @property
+    def selection(self):
+        return FieldSelection.from_request(self.request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['selection'] = self.selection
+        return context
+
+    def count_tags(self, request):
+        """Теги инвалидации числа рецептов списка."""
+        if self.action != 'list':
+            return None
+        tags = {ALL_RECIPES}
+        tags.update(
+            slug_tag(slug) for slug in request.query_params.getlist('tags')
+        )
+        for kind in ('is_favorited', 'is_in_shopping_cart'):
+            if kind in request.query_params:
+                tags.add(relation_tag(kind, request.user.pk))
+        return tags
+
+    def with_related(self, queryset):
+        """Подгрузка связанных объектов только для выбранных полей."""
+        selection = self.selection or FieldSelection()
+        if selection.includes('author') and selection.expanded('author'):
+            queryset = queryset.select_related('author')
+        if selection.includes('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if selection.includes('ingredients'):
+            queryset = queryset.prefetch_related(
+                'ingredient_recipes__ingredient'
+            )
+        return queryset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET' or (
+            settings.FAST_READ_PATH and self.action in ('list', 'retrieve')
+        ):
+            return queryset
+        return self.with_related(queryset)
+
+    def list(self, request, *args, **kwargs):
+        """Список рецептов, для анонимных запросов из общего кеша."""
+        if request.user.is_authenticated:
+            return self.list_response(request, *args, **kwargs)
+        selection = self.selection
+        if selection is not None and not selection.includes('id'):
+            return self.list_response(request, *args, **kwargs)
+        key = response_cache.key(request)
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+        tokens = response_cache.tokens(list_tags(request))
+        page_ids = self.page_ids(request)
+        tokens.update(response_cache.tokens(
+            recipe_tag(recipe_id) for recipe_id in page_ids
+        ))
+        response = self.list_response(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and page_ids == [
+            recipe['id'] for recipe in response.data['results']
+        ]:
+            response_cache.set(key, response.data, tokens)
+        return response
+
+    def page_ids(self, request):
+        """Id рецептов страницы списка для чтения токенов до ее построения."""
+        queryset = self.filter_queryset(self.get_queryset())
+        offset = self.paginator.get_offset(request)
+        limit = self.paginator.get_limit(request)
+        return list(queryset.values_list('id', flat=True)[
+            offset:None if limit is None else offset + limit
+        ])
+
+    def list_response(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().list(request, *args, **kwargs)
+        selection = self.selection
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(
+            queryset.values(*recipe_fields(selection))
+        )
+        return self.get_paginated_response(
+            build_recipes(page, request, selection)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().retrieve(request, *args, **kwargs)
+        recipe = self.get_object()
+        return Response(build_recipes(
+            [recipe_row(recipe)], request, self.selection
+        )[0])
+
+    def perform_action(self, model, user, pk, message):
+        """Добавление рецепта, дубликаты отсекает уникальное ограничение."""
+        recipe = Recipe.objects.only(
+            'id', 'name', 'image', 'cooking_time'
+        ).filter(id=pk).first()
+        if recipe is None:
+            return Response({
+                'errors': 'Рецепт не найден'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                model.objects.create(user=user, recipe=recipe)
+        except IntegrityError:
+            return Response({
+                'errors': message
+            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer = RecipeShortSerializer(
+            recipe, context={'request': self.request}
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(
+        detail=False,
+        methods=('POST',),
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def bulk(self, request):
+        """Пакетное создание рецептов с результатом по каждому рецепту."""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({
+                'errors': 'Нужно передать непустой список рецептов'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_RECIPES_MAX:
+            return Response({
+                'errors': 'За один запрос можно создать не больше '
+                          f'{BULK_RECIPES_MAX} рецептов'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        results = BulkRecipeCreator(self.get_serializer_context()).run(items)
+        created = sum('id' in result for result in results)
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }, status=code)
+
     @action(methods=('POST',), detail=True)
     def favorite(self, request, pk):
-        return self.perform_action(FavoriteSerializer, request.user, pk)
+        return self.perform_action(
+            Favorite, request.user, pk,
+            'Вы уже добавляли это рецепт в избранное'
+        )
 
     @favorite.mapping.delete
     def delete_favorite(self, request, pk=None):
@@ -74,12 +262,120 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @action(methods=('POST',), detail=True)
     def shopping_cart(self, request, pk):
-        return self.perform_action(ShoppingCartSerializer, request.user, pk)
+        return self.perform_action(
+            ShoppingCart, request.user, pk,
+            'Вы уже добавляли это рецепт в список покупок'
+        )
 
     @shopping_cart.mapping.delete
     def delete_shopping_cart(self, request, pk=None):
         return self.delete_recipe(ShoppingCart, request.user, pk)
 
+    @action(detail=False, methods=('GET',))
+    def trending(self, request):
+        """Популярные рецепты по предрассчитанному рейтингу."""
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            ranking__isnull=False
+        ).order_by('-ranking__score')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=('GET',),
+        permission_classes=(permissions.IsAuthenticated,),
+        pagination_class=FeedPagination
+    )
+    def feed(self, request):
+        """Новые рецепты авторов, на которых подписан пользователь."""
+        keys = self.paginate_queryset(partial(feed_timeline, request.user))
+        recipes = self.with_related(Recipe.objects.all()).in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        page = [
+            recipes[recipe_id] for _, recipe_id in keys
+            if recipe_id in recipes
+        ]
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=('GET',))
+    def by_ingredients(self, request):
+        """Рецепты, которые можно приготовить из имеющихся ингредиентов."""
+        try:
+            ingredient_ids = [
+                int(value)
+                for value in request.query_params.getlist('ingredients')
+            ]
+            max_missing = request.query_params.get('max_missing')
+            if max_missing is not None:
+                max_missing = int(max_missing)
+        except ValueError:
+            raise ValidationError(
+                {'errors': 'Ингредиенты и max_missing должны быть числами'}
+            )
+        if not ingredient_ids:
+            raise ValidationError(
+                {'errors': 'Нужно указать минимум 1 ингредиент'}
+            )
+        page = self.paginate_queryset(
+            ingredient_index.search(ingredient_ids, max_missing)
+        )
+        recipes = self.with_related(Recipe.objects.all()).in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        matches = []
+        for recipe_id, matched, missing in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched_ingredients = matched
+            recipe.missing_ingredients = missing
+            matches.append(recipe)
+        serializer = RecipeMatchSerializer(
+            matches, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=('GET',))
+    def similar(self, request, pk):
+        """Рецепты с похожим набором ингредиентов и тегов."""
+        recipe = self.get_object()
+        limit = request.query_params.get('limit', '')
+        limit = (
+            min(int(limit), SIMILAR_RECIPES_MAX_LIMIT)
+            if limit.isdigit() else SIMILAR_RECIPES_LIMIT
+        )
+        scores = find_similar(recipe, limit)
+        recipes = self.with_related(Recipe.objects.all()).in_bulk(
+            [recipe_id for recipe_id, _ in scores]
+        )
+        similar = []
+        for recipe_id, similarity in scores:
+            if recipe_id in recipes:
+                recipes[recipe_id].similarity = similarity
+                similar.append(recipes[recipe_id])
+        serializer = RecipeSimilarSerializer(
+            similar, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=('GET',),
+        permission_classes=(permissions.IsAdminUser,)
+    )
+    def export(self, request):
+        """Потоковая выгрузка всех рецептов в формате NDJSON."""
+        response = StreamingHttpResponse(
+            export_recipes(), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+        return response
+
     @action(
         detail=False,
         methods=('GET',),
@@ -88,24 +384,14 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def download_shopping_cart(self, request):
         """Позволяет текущему пользователю загрузить список покупок."""
-        ingredients_cart = (
-            IngredientRecipe.objects.filter(
-                recipe__shopping_carts__user=request.user
-            ).values(
-                'ingredient__name',
-                'ingredient__measurement_unit',
-            ).order_by(
-                'ingredient__name'
-            ).annotate(ingredient_value=Sum('amount'))
-        )
-        return create_shopping_cart(ingredients_cart)
+        return create_shopping_cart(shopping_cart_ingredients(request.user))
 
     def delete_recipe(self, model, user, pk):
-        recipe = get_object_or_404(Recipe, id=pk)
-        obj = model.objects.filter(user=user, recipe=recipe)
-        if obj.exists():
-            obj.delete()
+        deleted, _ = model.objects.filter(user=user, recipe_id=pk).delete()
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
+        if not Recipe.objects.filter(id=pk).exists():
+            raise Http404
         return Response({
             'errors': 'Рецепт уже удален'
         }, status=status.HTTP_400_BAD_REQUEST)
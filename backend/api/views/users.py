@@ -1,3 +1,5 @@
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Exists, OuterRef, Value
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as UserView
 from rest_framework import permissions, status
@@ -5,20 +7,51 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 
+from api.cache import ALL_USERS, relation_tag
+from api.fields import FieldSelection
+from api.mixins import ReplicaReadMixin
 from api.pagination import PageLimitPagination
-from api.serializers.users import (SubscribeSerializer,
-                                   SubscribeShowSerializer,
-                                   UserGETSerializer)
+from api.serializers.users import SubscribeShowSerializer, UserGETSerializer
 from users.models import Subscribe, User
 
 
-class UserViewSet(UserView):
+class UserViewSet(ReplicaReadMixin, UserView):
     """Вьюсет модели User."""
 
     queryset = User.objects.all()
     serializer_class = UserGETSerializer
     permission_classes = (AllowAny,)
     pagination_class = PageLimitPagination
+    replica_actions = ('list', 'subscriptions')
+    throttle_costs = {
+        'create': 10,
+        'subscriptions': 5,
+    }
+
+    def get_queryset(self):
+        """Пользователи с отметкой подписки текущего пользователя."""
+        user = self.request.user
+        queryset = super().get_queryset()
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField())
+            )
+        return queryset.annotate(is_subscribed=Exists(
+            Subscribe.objects.filter(author=OuterRef('pk'), subscriber=user)
+        ))
+
+    def count_tags(self, request):
+        """Теги инвалидации числа пользователей и подписок."""
+        if self.action == 'list':
+            return {ALL_USERS}
+        if self.action == 'subscriptions':
+            return {relation_tag('subscriptions', request.user.pk)}
+        return None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['selection'] = FieldSelection.from_request(self.request)
+        return context
 
     @action(
         detail=False,
@@ -36,7 +69,8 @@ class UserViewSet(UserView):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer = UserGETSerializer(
-            request.user, context={'request': request}
+            self.get_queryset().get(pk=request.user.pk),
+            context=self.get_serializer_context()
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -48,29 +82,41 @@ class UserViewSet(UserView):
     )
     def subscribe(self, request, id):
         author = get_object_or_404(User, id=id)
-        serializer = SubscribeSerializer(
-            data={'subscriber': request.user.id, 'author': author.id},
-            context={'request': request}
+        if author == request.user:
+            return Response(
+                {'errors': 'Нельзя подписаться на себя'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            with transaction.atomic():
+                Subscribe.objects.create(
+                    subscriber=request.user, author=author
+                )
+            author.is_subscribed = True
+        except IntegrityError:
+            return Response(
+                {'errors': 'Вы уже подписывались на этого автора'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = SubscribeShowSerializer(
+            author, context=self.get_serializer_context()
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
         return Response(
             serializer.data, status=status.HTTP_201_CREATED
         )
 
     @subscribe.mapping.delete
     def delete_subscribe(self, request, id):
-        author = get_object_or_404(User, id=id)
-        subscription = Subscribe.objects.filter(
-            subscriber=request.user, author=author
+        deleted, _ = Subscribe.objects.filter(
+            subscriber=request.user, author_id=id
+        ).delete()
+        if deleted:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(User, id=id)
+        return Response(
+            {'errors': 'Подписка не найдена'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        if not subscription.exists():
-            return Response(
-                {'errors': 'Подписка не найдена'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        subscription.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
         detail=False,
@@ -79,12 +125,14 @@ class UserViewSet(UserView):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def subscriptions(self, request):
-        authors = User.objects.filter(authors__subscriber=request.user)
+        authors = User.objects.filter(
+            authors__subscriber=request.user
+        ).annotate(is_subscribed=Value(True, output_field=BooleanField()))
         paginator = PageLimitPagination()
         result_pages = paginator.paginate_queryset(
-            queryset=authors, request=request
+            queryset=authors, request=request, view=self
         )
         serializer = SubscribeShowSerializer(
-            result_pages, context={'request': request}, many=True
+            result_pages, context=self.get_serializer_context(), many=True
         )
         return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,144 @@
+"""Общие функции бенчмарков: настройка Django и генерация данных."""
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(sqlite=False, test_database=True):
+    """Настраивает Django и создает тестовую базу данных.
+
+    С флагом sqlite используется SQLite в памяти, иначе база из настроек
+    проекта (например, локальный Postgres). Без test_database работа идет
+    с базой из настроек. Возвращает функцию очистки.
+    """
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    from django.conf import settings
+    if sqlite:
+        settings.DATABASES['default'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    settings.ALLOWED_HOSTS = ['*']
+    import django
+    django.setup()
+    if not test_database:
+        return lambda: None
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    def teardown():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    return teardown
+
+
+def seed(recipes=200, users=20, ingredients=500, per_recipe=10, seed=1):
+    """Заполняет базу сгенерированными пользователями и рецептами."""
+    from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                                Recipe, ShoppingCart, Tag)
+    from users.models import Subscribe, User
+
+    rng = random.Random(seed)
+    User.objects.bulk_create([
+        User(
+            email=f'user{number}@example.com',
+            username=f'user{number}',
+            first_name=f'Имя{number}',
+            last_name=f'Фамилия{number}',
+            password='!'
+        )
+        for number in range(users)
+    ])
+    user_objects = list(User.objects.order_by('id'))
+    Tag.objects.bulk_create([
+        Tag(name=name, color=color, slug=slug)
+        for name, color, slug in (
+            ('Завтрак', '#E26C2D', 'breakfast'),
+            ('Обед', '#49B64E', 'lunch'),
+            ('Ужин', '#8775D2', 'dinner'),
+        )
+    ])
+    tags = list(Tag.objects.order_by('id'))
+    Ingredient.objects.bulk_create([
+        Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+        for number in range(ingredients)
+    ])
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    Recipe.objects.bulk_create([
+        Recipe(
+            name=f'Рецепт {number}',
+            image='recipes/image.png',
+            text='Описание рецепта. ' * 10,
+            cooking_time=rng.randint(1, 120),
+            author=rng.choice(user_objects)
+        )
+        for number in range(recipes)
+    ])
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag.id)
+        for recipe_id in recipe_ids
+        for tag in rng.sample(tags, rng.randint(1, len(tags)))
+    ])
+    IngredientRecipe.objects.bulk_create([
+        IngredientRecipe(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=rng.randint(1, 500)
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+    ])
+    for model in (Favorite, ShoppingCart):
+        model.objects.bulk_create([
+            model(user=user, recipe_id=recipe_id)
+            for user in user_objects
+            for recipe_id in rng.sample(
+                recipe_ids, min(len(recipe_ids), 10)
+            )
+        ])
+    Subscribe.objects.bulk_create([
+        Subscribe(subscriber=user, author=author)
+        for user in user_objects
+        for author in rng.sample(user_objects, min(len(user_objects), 5))
+        if author != user
+    ])
+    from recipes.counters import recount_counters
+    recount_counters()
+    return user_objects
+
+
+@contextmanager
+def count_queries():
+    """Считает SQL-запросы внутри блока: result['queries']."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    result = {}
+    with CaptureQueriesContext(connection) as context:
+        yield result
+    result['queries'] = len(context.captured_queries)
+
+
+def measure(function, repeat):
+    """Время выполнения функции: список замеров в секундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
@@ -0,0 +1,107 @@
+"""Сравнение прежнего и нового фильтра рецептов по тегам и авторам.
+
+Прежний фильтр на AllValuesMultipleFilter на каждом запросе выбирает
+DISTINCT значений по всем рецептам для проверки параметров и фильтрует
+через JOIN с тегами и DISTINCT. Для каждого набора параметров проверяется
+совпадение найденных рецептов и выводятся время подсчета и выборки
+страницы и число SQL-запросов. Неизвестный автор в прежнем фильтре дает
+ошибку 400, в новом - пустой результат; это проверяется отдельно.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.filters --sqlite --recipes 20000
+"""
+import argparse
+import statistics
+
+from benchmarks.base import count_queries, measure, seed, setup_django
+
+
+def run(args):
+    from django.http import QueryDict
+    from django_filters import rest_framework as filters
+
+    from api.filters import RecipeFilter
+    from recipes.models import Recipe
+    from users.models import User
+
+    class OldRecipeFilter(filters.FilterSet):
+        tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+        author = filters.AllValuesMultipleFilter(field_name='author__id')
+
+        class Meta:
+            model = Recipe
+            fields = ('tags', 'author')
+
+    seed(recipes=args.recipes, users=args.users, per_recipe=2)
+    author_ids = Recipe.objects.order_by('author_id').values_list(
+        'author_id', flat=True
+    ).distinct()[:3]
+    authors = '&'.join(f'author={author_id}' for author_id in author_ids)
+    cases = (
+        'tags=breakfast',
+        'tags=breakfast&tags=lunch',
+        'tags=breakfast&tags=lunch&tags=dinner',
+        authors,
+        f'tags=lunch&tags=dinner&{authors}',
+    )
+    unknown = QueryDict(f'author={User.objects.order_by("-id")[0].id + 1}')
+    if OldRecipeFilter(unknown, Recipe.objects.all()).is_valid():
+        raise AssertionError('прежний фильтр принял неизвестного автора')
+    if RecipeFilter(unknown, Recipe.objects.all()).qs.exists():
+        raise AssertionError('новый фильтр нашел рецепты неизвестного автора')
+    print(
+        'неизвестный автор: прежний фильтр - ошибка 400, '
+        'новый - пустой результат'
+    )
+    for params in cases:
+        data = QueryDict(params)
+
+        def page(filterset_class):
+            queryset = filterset_class(data, Recipe.objects.all()).qs
+            return queryset.count(), list(
+                queryset.values_list('id', flat=True)[:args.page]
+            )
+
+        def ids(filterset_class):
+            queryset = filterset_class(data, Recipe.objects.all()).qs
+            return set(queryset.values_list('id', flat=True))
+
+        if ids(OldRecipeFilter) != ids(RecipeFilter):
+            raise AssertionError(f'{params}: рецепты не совпадают')
+        with count_queries() as old_queries:
+            page(OldRecipeFilter)
+        with count_queries() as new_queries:
+            page(RecipeFilter)
+        old_time = statistics.median(
+            measure(lambda: page(OldRecipeFilter), args.repeat)
+        )
+        new_time = statistics.median(
+            measure(lambda: page(RecipeFilter), args.repeat)
+        )
+        print(
+            f'{params}: old {old_time * 1e3:.2f} ms '
+            f'({old_queries["queries"]} queries), '
+            f'new {new_time * 1e3:.2f} ms '
+            f'({new_queries["queries"]} queries), '
+            f'x{old_time / new_time:.1f}, {page(RecipeFilter)[0]} recipes'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sqlite', action='store_true')
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--page', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    teardown = setup_django(sqlite=args.sqlite)
+    try:
+        run(args)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,473 @@
+"""Нагрузочное тестирование API по сценариям пользователей.
+
+Виртуальные пользователи входят под учетными записями из заполненной
+базы и в цикле выполняют сценарии: просмотр списка рецептов с фильтром
+по тегам и открытие рецепта, добавление в избранное и удаление из него,
+работа со списком покупок с выгрузкой PDF и просмотр подписок. Запросы
+выполняются асинхронным HTTP-клиентом на asyncio с keep-alive
+соединениями, без сторонних зависимостей. В отчете JSON и HTML
+пропускная способность, перцентили задержки и доля ошибок по каждому
+эндпоинту.
+
+Ограничение частоты запросов на сервере нужно отключить, иначе ответы
+429 будут учтены как ошибки:
+
+    THROTTLE_USER_RATE= THROTTLE_IP_RATE= gunicorn ...
+
+Запуск из каталога backend:
+
+    python -m benchmarks.load seed --recipes 2000 --users 50
+    python -m benchmarks.load run --url http://127.0.0.1:8000 \\
+        --users 20 --duration 60 --report load
+"""
+import argparse
+import asyncio
+import html
+import json
+import random
+import ssl
+import statistics
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.base import percentile, seed, setup_django
+
+EMAIL = 'user{number}@example.com'
+PASSWORD = 'load-test-password'
+TAG_SLUGS = ('breakfast', 'lunch', 'dinner')
+SCENARIOS = {
+    'browse': 50,
+    'favorite': 15,
+    'shopping_cart': 15,
+    'subscriptions': 20,
+}
+
+
+class Response:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class Connection:
+    """Соединение HTTP/1.1 с keep-alive поверх потоков asyncio."""
+
+    def __init__(self, url, token=None, timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.netloc = parts.netloc
+        self.ssl = ssl.create_default_context() if (
+            parts.scheme == 'https'
+        ) else None
+        self.token = token
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        try:
+            return await asyncio.wait_for(
+                self._request(method, path, body), self.timeout
+            )
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _request(self, method, path, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl
+            )
+        data = b'' if body is None else json.dumps(body).encode()
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.netloc}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+            f'Content-Length: {len(data)}',
+        ]
+        if data:
+            lines.append('Content-Type: application/json')
+        if self.token:
+            lines.append(f'Authorization: Token {self.token}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + data)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Сервер закрыл соединение')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if method == 'HEAD' or status in (204, 304):
+            content = b''
+        elif headers.get('transfer-encoding') == 'chunked':
+            content = await self._read_chunked()
+        elif 'content-length' in headers:
+            content = await self.reader.readexactly(
+                int(headers['content-length'])
+            )
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection') == 'close':
+            await self.close()
+        return Response(status, content)
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                while (await self.reader.readline()) not in (b'\r\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+
+class Stats:
+    """Результаты запросов по эндпоинтам."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.timeline = Counter()
+        self.started = None
+
+    def add(self, endpoint, status, latency, finished):
+        self.latencies[endpoint].append(latency)
+        self.statuses[endpoint][status] += 1
+        self.timeline[int(finished - self.started)] += 1
+
+    def report(self, args, duration):
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            errors = sum(
+                count for status, count in self.statuses[endpoint].items()
+                if not 200 <= status < 400
+            )
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'errors': errors,
+                'error_rate': errors / len(latencies),
+                'throughput': len(latencies) / duration,
+                'mean': statistics.mean(latencies),
+                'p50': percentile(latencies, 0.5),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+                'max': max(latencies),
+                'statuses': {
+                    str(status): count
+                    for status, count in sorted(
+                        self.statuses[endpoint].items()
+                    )
+                },
+            }
+        requests = sum(item['requests'] for item in endpoints.values())
+        errors = sum(item['errors'] for item in endpoints.values())
+        latencies = [
+            latency for values in self.latencies.values()
+            for latency in values
+        ]
+        return {
+            'url': args.url,
+            'duration': duration,
+            'users': args.users,
+            'requests': requests,
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+            'throughput': requests / duration,
+            'p50': percentile(latencies, 0.5) if latencies else None,
+            'p95': percentile(latencies, 0.95) if latencies else None,
+            'p99': percentile(latencies, 0.99) if latencies else None,
+            'endpoints': endpoints,
+            'timeline': [
+                self.timeline[second] for second in range(int(duration) + 1)
+            ],
+        }
+
+
+class VirtualUser:
+    """Пользователь, выполняющий случайные сценарии до окончания теста."""
+
+    def __init__(self, number, args, stats):
+        self.number = number
+        self.args = args
+        self.stats = stats
+        self.rng = random.Random(args.seed + number)
+        self.connection = Connection(args.url, timeout=args.timeout)
+        self.recipe_ids = []
+
+    async def call(self, endpoint, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            response = await self.connection.request(method, path, body)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError,
+                asyncio.IncompleteReadError):
+            response = Response(0, b'')
+        finished = time.perf_counter()
+        self.stats.add(
+            f'{method} {endpoint}', response.status,
+            finished - started, finished
+        )
+        return response
+
+    async def login(self):
+        response = await self.call(
+            '/api/auth/token/login/', 'POST', '/api/auth/token/login/',
+            {
+                'email': EMAIL.format(number=self.number),
+                'password': PASSWORD,
+            }
+        )
+        if not response.ok:
+            raise RuntimeError(
+                f'Не удалось войти как {EMAIL.format(number=self.number)}: '
+                f'{response.status}'
+            )
+        self.connection.token = response.json()['auth_token']
+
+    async def recipe(self):
+        if not self.recipe_ids:
+            await self.browse(open_recipe=False)
+        if not self.recipe_ids:
+            return None
+        recipe_id = self.rng.choice(self.recipe_ids)
+        response = await self.call(
+            '/api/recipes/{id}/', 'GET', f'/api/recipes/{recipe_id}/'
+        )
+        return response.json() if response.ok else None
+
+    async def browse(self, open_recipe=True):
+        params = [('limit', 6)]
+        params += [
+            ('tags', slug) for slug in self.rng.sample(
+                TAG_SLUGS, self.rng.randint(0, len(TAG_SLUGS))
+            )
+        ]
+        if self.rng.random() < 0.3:
+            params.append(('offset', 6 * self.rng.randint(1, 5)))
+        response = await self.call(
+            '/api/recipes/', 'GET', f'/api/recipes/?{urlencode(params)}'
+        )
+        if response.ok:
+            self.recipe_ids = [
+                recipe['id'] for recipe in response.json()['results']
+            ] or self.recipe_ids
+        if open_recipe:
+            await self.recipe()
+
+    async def toggle(self, recipe, flag, action):
+        path = f'/api/recipes/{recipe["id"]}/{action}/'
+        endpoint = f'/api/recipes/{{id}}/{action}/'
+        method = 'DELETE' if recipe[flag] else 'POST'
+        await self.call(endpoint, method, path)
+
+    async def favorite(self):
+        recipe = await self.recipe()
+        if recipe is not None:
+            await self.toggle(recipe, 'is_favorited', 'favorite')
+
+    async def shopping_cart(self):
+        recipe = await self.recipe()
+        if recipe is None:
+            return
+        if not recipe['is_in_shopping_cart']:
+            await self.toggle(recipe, 'is_in_shopping_cart', 'shopping_cart')
+            recipe['is_in_shopping_cart'] = True
+        await self.call(
+            '/api/recipes/download_shopping_cart/', 'GET',
+            '/api/recipes/download_shopping_cart/'
+        )
+        await self.toggle(recipe, 'is_in_shopping_cart', 'shopping_cart')
+
+    async def subscriptions(self):
+        await self.call(
+            '/api/users/subscriptions/', 'GET',
+            '/api/users/subscriptions/?limit=6&recipes_limit=3'
+        )
+
+    async def run(self, deadline):
+        names = list(SCENARIOS)
+        weights = list(SCENARIOS.values())
+        try:
+            while time.perf_counter() < deadline:
+                scenario = self.rng.choices(names, weights)[0]
+                await getattr(self, scenario)()
+                if self.args.think:
+                    await asyncio.sleep(
+                        self.rng.uniform(0, 2 * self.args.think)
+                    )
+        finally:
+            await self.connection.close()
+
+
+async def run_load(args):
+    stats = Stats()
+    stats.started = time.perf_counter()
+    users = [VirtualUser(number, args, stats) for number in range(args.users)]
+    await asyncio.gather(*(user.login() for user in users))
+    stats.latencies.clear()
+    stats.statuses.clear()
+    stats.timeline.clear()
+    started_at = datetime.now().isoformat(timespec='seconds')
+    started = stats.started = time.perf_counter()
+    deadline = started + args.duration
+
+    async def start(user):
+        await asyncio.sleep(args.ramp_up * user.number / len(users))
+        await user.run(deadline)
+
+    await asyncio.gather(*(start(user) for user in users))
+    report = stats.report(args, time.perf_counter() - started)
+    return {'started': started_at, **report}
+
+
+def render_html(report):
+    rows = ''.join(
+        f'<tr><td>{html.escape(endpoint)}</td>'
+        f'<td>{item["requests"]}</td>'
+        f'<td>{item["throughput"]:.1f}</td>'
+        f'<td>{item["p50"] * 1e3:.1f}</td>'
+        f'<td>{item["p95"] * 1e3:.1f}</td>'
+        f'<td>{item["p99"] * 1e3:.1f}</td>'
+        f'<td>{item["max"] * 1e3:.1f}</td>'
+        f'<td>{item["error_rate"] * 100:.2f}%</td>'
+        f'<td>{html.escape(json.dumps(item["statuses"]))}</td></tr>'
+        for endpoint, item in report['endpoints'].items()
+    )
+    timeline = report['timeline'] or [0]
+    top = max(timeline) or 1
+    step = 600 / max(1, len(timeline) - 1)
+    points = ' '.join(
+        f'{index * step:.1f},{150 - 140 * value / top:.1f}'
+        for index, value in enumerate(timeline)
+    )
+    return f'''<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>Нагрузочный тест {html.escape(report['url'])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+td:first-child {{ text-align: left; }}
+</style>
+</head>
+<body>
+<h1>Нагрузочный тест {html.escape(report['url'])}</h1>
+<p>{report['started']}, {report['users']} пользователей,
+{report['duration']:.0f} с: {report['requests']} запросов,
+{report['throughput']:.1f} запросов/с, ошибок
+{report['error_rate'] * 100:.2f}%.</p>
+<h2>Запросов в секунду</h2>
+<svg width="600" height="150" style="border: 1px solid #ccc">
+<polyline fill="none" stroke="#49B64E" stroke-width="2" points="{points}"/>
+</svg>
+<p>Максимум {top} запросов/с.</p>
+<h2>Эндпоинты</h2>
+<table>
+<tr><th>Эндпоинт</th><th>Запросов</th><th>Запросов/с</th><th>p50, мс</th>
+<th>p95, мс</th><th>p99, мс</th><th>max, мс</th><th>Ошибки</th>
+<th>Статусы</th></tr>
+{rows}
+</table>
+</body>
+</html>
+'''
+
+
+def print_report(report):
+    print(
+        f'{report["requests"]} requests in {report["duration"]:.1f} s, '
+        f'{report["throughput"]:.1f} req/s, '
+        f'errors {report["error_rate"] * 100:.2f}%'
+    )
+    for endpoint, item in report['endpoints'].items():
+        print(
+            f'{endpoint:<48} {item["requests"]:6} '
+            f'{item["throughput"]:7.1f} req/s '
+            f'p50 {item["p50"] * 1e3:7.1f} ms '
+            f'p95 {item["p95"] * 1e3:7.1f} ms '
+            f'p99 {item["p99"] * 1e3:7.1f} ms '
+            f'errors {item["error_rate"] * 100:.2f}%'
+        )
+
+
+def run(args):
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.report:
+        with open(f'{args.report}.json', 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        with open(f'{args.report}.html', 'w', encoding='utf-8') as file:
+            file.write(render_html(report))
+
+
+def seed_database(args):
+    setup_django(test_database=False)
+    from django.contrib.auth.hashers import make_password
+
+    from users.models import User
+
+    if User.objects.filter(email=EMAIL.format(number=0)).exists():
+        print('База уже заполнена')
+    else:
+        seed(recipes=args.recipes, users=args.users, per_recipe=10)
+    User.objects.filter(email__endswith='@example.com').update(
+        password=make_password(PASSWORD)
+    )
+    print(f'Пользователи user0..user{args.users - 1}@example.com')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    seed_parser = commands.add_parser(
+        'seed', help='заполнить базу из настроек проекта'
+    )
+    seed_parser.add_argument('--recipes', type=int, default=2000)
+    seed_parser.add_argument('--users', type=int, default=50)
+    run_parser = commands.add_parser('run', help='запустить нагрузку')
+    run_parser.add_argument('--url', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--users', type=int, default=10)
+    run_parser.add_argument('--duration', type=float, default=30)
+    run_parser.add_argument('--ramp-up', type=float, default=0)
+    run_parser.add_argument(
+        '--think', type=float, default=0,
+        help='средняя пауза между сценариями, секунды'
+    )
+    run_parser.add_argument('--timeout', type=float, default=30)
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument(
+        '--report', help='префикс файлов отчета .json и .html'
+    )
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed_database(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Сравнение сериализаторов DRF и быстрого пути чтения.
+
+Для страницы рецептов, списка тегов и списка ингредиентов строит ответ
+двумя способами, проверяет побайтовое совпадение JSON и выводит время и
+число SQL-запросов.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.read_path --sqlite --recipes 500 --page 50
+"""
+import argparse
+import statistics
+
+from benchmarks.base import count_queries, measure, seed, setup_django
+
+
+def compare(name, slow, fast, repeat):
+    slow_output = slow()
+    fast_output = fast()
+    if slow_output != fast_output:
+        raise AssertionError(f'{name}: ответы не совпадают')
+    with count_queries() as slow_queries:
+        slow()
+    with count_queries() as fast_queries:
+        fast()
+    slow_time = statistics.median(measure(slow, repeat))
+    fast_time = statistics.median(measure(fast, repeat))
+    print(
+        f'{name}: drf {slow_time * 1e3:.2f} ms '
+        f'({slow_queries["queries"]} queries), '
+        f'fast {fast_time * 1e3:.2f} ms '
+        f'({fast_queries["queries"]} queries), '
+        f'x{slow_time / fast_time:.1f}, {len(fast_output)} bytes'
+    )
+
+
+def run(args):
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from api.renderers import FastJSONRenderer
+    from api.serializers.lean import (RECIPE_FIELDS, build_ingredients,
+                                      build_recipes, build_tags)
+    from api.serializers.recipes import (IngredientSerializer,
+                                         RecipeGETSerializer, TagSerializer)
+    from recipes.models import Ingredient, Recipe, Tag
+
+    users = seed(recipes=args.recipes, per_recipe=args.ingredients)
+    request = Request(APIRequestFactory().get('/api/recipes/'))
+    request.user = users[0]
+    slow_renderer = JSONRenderer()
+    fast_renderer = FastJSONRenderer()
+
+    compare(
+        f'recipes x{args.page}',
+        lambda: slow_renderer.render(RecipeGETSerializer(
+            Recipe.objects.all()[:args.page],
+            many=True, context={'request': request}
+        ).data),
+        lambda: fast_renderer.render(build_recipes(
+            Recipe.objects.values(*RECIPE_FIELDS)[:args.page], request
+        )),
+        args.repeat
+    )
+    compare(
+        'tags',
+        lambda: slow_renderer.render(
+            TagSerializer(Tag.objects.all(), many=True).data
+        ),
+        lambda: fast_renderer.render(build_tags(Tag.objects.all())),
+        args.repeat
+    )
+    compare(
+        'ingredients',
+        lambda: slow_renderer.render(
+            IngredientSerializer(Ingredient.objects.all(), many=True).data
+        ),
+        lambda: fast_renderer.render(
+            build_ingredients(Ingredient.objects.all())
+        ),
+        args.repeat
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sqlite', action='store_true')
+    parser.add_argument('--recipes', type=int, default=500)
+    parser.add_argument('--ingredients', type=int, default=10)
+    parser.add_argument('--page', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    teardown = setup_django(sqlite=args.sqlite)
+    try:
+        run(args)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
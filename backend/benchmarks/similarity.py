@@ -0,0 +1,118 @@
+"""Бенчмарк поиска похожих рецептов по MinHash и LSH.
+
+Генерирует набор рецептов из «семейств» с общим ядром ингредиентов,
+строит сигнатуры и корзины LSH в памяти и сравнивает их с точным
+перебором по коэффициенту Жаккара: время построения, задержку запроса
+и полноту top-k.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.similarity --recipes 20000 --queries 200
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.base import percentile
+from recipes import minhash
+
+
+def generate(recipes, ingredients, tags, seed):
+    rng = random.Random(seed)
+    families = [
+        rng.sample(range(1, ingredients + 1), rng.randint(6, 14))
+        for _ in range(max(1, recipes // 20))
+    ]
+    dataset = []
+    for _ in range(recipes):
+        core = rng.choice(families)
+        recipe_ingredients = set(rng.sample(core, max(3, len(core) - 2)))
+        recipe_ingredients.update(
+            rng.randint(1, ingredients) for _ in range(rng.randint(0, 4))
+        )
+        recipe_tags = set(rng.sample(range(1, tags + 1), rng.randint(1, 3)))
+        dataset.append(minhash.features(recipe_ingredients, recipe_tags))
+    return dataset
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--ingredients', type=int, default=2000)
+    parser.add_argument('--tags', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--top', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    dataset = generate(args.recipes, args.ingredients, args.tags, args.seed)
+
+    started = time.perf_counter()
+    signatures = [minhash.signature(features) for features in dataset]
+    signature_time = time.perf_counter() - started
+
+    buckets = defaultdict(list)
+    recipe_bands = []
+    for recipe_id, signature in enumerate(signatures):
+        bands = minhash.bands(signature)
+        recipe_bands.append(bands)
+        for band in bands:
+            buckets[band].append(recipe_id)
+
+    rng = random.Random(args.seed + 1)
+    queries = rng.sample(range(args.recipes), min(args.queries, args.recipes))
+    lsh_latency = []
+    exact_latency = []
+    recall = []
+    for query in queries:
+        started = time.perf_counter()
+        hits = Counter()
+        for band in recipe_bands[query]:
+            hits.update(buckets[band])
+        del hits[query]
+        scored = sorted(
+            (
+                (minhash.similarity(signatures[query], signatures[other]),
+                 other)
+                for other, _ in hits.most_common(500)
+            ),
+            reverse=True
+        )[:args.top]
+        lsh_latency.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        exact = sorted(
+            (
+                (jaccard(dataset[query], dataset[other]), other)
+                for other in range(args.recipes) if other != query
+            ),
+            reverse=True
+        )[:args.top]
+        exact_latency.append(time.perf_counter() - started)
+
+        expected = {other for score, other in exact if score > 0}
+        if expected:
+            found = {other for _, other in scored}
+            recall.append(len(found & expected) / len(expected))
+
+    print(f'recipes: {args.recipes}, queries: {len(queries)}')
+    print(
+        'signatures: '
+        f'{signature_time / args.recipes * 1e6:.1f} us/recipe'
+    )
+    for name, values in (('lsh', lsh_latency), ('exact', exact_latency)):
+        print(
+            f'{name} query: p50 {percentile(values, 0.5) * 1e3:.2f} ms, '
+            f'p95 {percentile(values, 0.95) * 1e3:.2f} ms'
+        )
+    print(f'recall@{args.top}: {statistics.mean(recall or [0]):.3f}')
+
+
+if __name__ == '__main__':
+    main()
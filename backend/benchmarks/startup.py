@@ -0,0 +1,170 @@
+"""Время запуска: импорт модулей, загрузка приложения и первые запросы.
+
+Каждый замер выполняется в отдельном процессе Python. Для модулей
+измеряется время импорта и прирост пикового RSS после django.setup(),
+для приложения - полная загрузка WSGI и URL-конфигурации, для запросов -
+время первого и второго обращения к эндпоинтам.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.startup --repeat 5 --json startup.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.base import BACKEND_DIR
+
+MODULES = (
+    'rest_framework.views',
+    'drf_extra_fields.fields',
+    'PIL.Image',
+    'reportlab.pdfgen.canvas',
+    'api.utils',
+    'api.serializers.recipes',
+    'api.views.recipes',
+    'foodgram.urls',
+)
+URLS = (
+    '/api/tags/',
+    '/api/recipes/',
+    '/api/recipes/download_shopping_cart/',
+)
+
+
+def rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def setup():
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+    django.setup()
+
+
+def probe_import(module):
+    import importlib
+    setup()
+    rss = rss_kb()
+    started = time.perf_counter()
+    importlib.import_module(module)
+    return {
+        'seconds': time.perf_counter() - started,
+        'rss_kb': rss_kb() - rss,
+    }
+
+
+def probe_application():
+    started = time.perf_counter()
+    setup()
+    from django.urls import get_resolver
+
+    from foodgram.wsgi import application  # noqa: F401
+    get_resolver().url_patterns
+    return {'seconds': time.perf_counter() - started, 'rss_kb': rss_kb()}
+
+
+def probe_requests():
+    from benchmarks.base import seed, setup_django
+    teardown = setup_django(sqlite=True)
+    try:
+        from rest_framework.test import APIClient
+        users = seed(recipes=50, users=5, ingredients=50, per_recipe=5)
+        client = APIClient()
+        client.force_authenticate(users[0])
+        result = {}
+        for url in URLS:
+            timings = []
+            for _ in range(2):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+                assert response.status_code == 200, (url, response)
+            result[url] = {'first': timings[0], 'second': timings[1]}
+        return result
+    finally:
+        teardown()
+
+
+def run_probe(*args):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.startup', '--probe', *args],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def median_of(samples, *keys):
+    values = samples
+    for key in keys:
+        values = [value[key] for value in values]
+    return statistics.median(values)
+
+
+def run(args):
+    results = {'modules': {}, 'application': {}, 'requests': {}}
+    for module in MODULES:
+        samples = [run_probe('import', module) for _ in range(args.repeat)]
+        results['modules'][module] = {
+            'seconds': median_of(samples, 'seconds'),
+            'rss_kb': median_of(samples, 'rss_kb'),
+        }
+        print(
+            f'import {module}: '
+            f'{results["modules"][module]["seconds"] * 1e3:.1f} ms, '
+            f'+{results["modules"][module]["rss_kb"] / 1024:.1f} MiB'
+        )
+    samples = [run_probe('application') for _ in range(args.repeat)]
+    results['application'] = {
+        'seconds': median_of(samples, 'seconds'),
+        'rss_kb': median_of(samples, 'rss_kb'),
+    }
+    print(
+        f'application: {results["application"]["seconds"] * 1e3:.1f} ms, '
+        f'{results["application"]["rss_kb"] / 1024:.1f} MiB'
+    )
+    samples = [run_probe('requests') for _ in range(args.repeat)]
+    for url in URLS:
+        results['requests'][url] = {
+            'first': median_of(samples, url, 'first'),
+            'second': median_of(samples, url, 'second'),
+        }
+        print(
+            f'GET {url}: first '
+            f'{results["requests"][url]["first"] * 1e3:.1f} ms, second '
+            f'{results["requests"][url]["second"] * 1e3:.1f} ms'
+        )
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    parser.add_argument(
+        '--probe', nargs='+', help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+    if args.probe:
+        kind, *rest = args.probe
+        probes = {
+            'import': probe_import,
+            'application': probe_application,
+            'requests': probe_requests,
+        }
+        print(json.dumps(probes[kind](*rest)))
+        return
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+"""Набор микробенчмарков сериализаторов и эндпоинтов.
+
+Каждый случай выполняется заданное число раундов после прогрева; для него
+выводятся минимальное, медианное и среднее время, разброс и число
+SQL-запросов за один вызов. Результаты можно сохранить в JSON вместе с
+коммитом и сравнить с прошлым запуском. Изменения данных выполняются в
+транзакции с откатом, поэтому раунды не влияют друг на друга.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.suite --sqlite --json before.json
+    python -m benchmarks.suite --sqlite --compare before.json
+    python -m benchmarks.suite --sqlite -k shopping_cart
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+from benchmarks.base import (BACKEND_DIR, count_queries, measure, seed,
+                             setup_django)
+
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+CASES = {}
+
+
+def case(function):
+    """Регистрирует случай: функция получает окружение и возвращает вызов."""
+    CASES[function.__name__] = function
+    return function
+
+
+def rolled_back(function):
+    """Вызов function в транзакции, которая всегда откатывается."""
+    from django.db import transaction
+
+    def call():
+        with transaction.atomic():
+            result = function()
+            transaction.set_rollback(True)
+        return result
+
+    return call
+
+
+class Environment:
+    """Данные и запросы, общие для всех случаев."""
+
+    def __init__(self, args):
+        from rest_framework.request import Request
+        from rest_framework.test import (APIRequestFactory,
+                                         force_authenticate)
+
+        from recipes.models import Ingredient, Recipe, Tag
+
+        self.args = args
+        self.users = seed(
+            recipes=args.recipes, users=args.users, per_recipe=args.ingredients
+        )
+        self.user = self.users[0]
+        self.factory = APIRequestFactory()
+        self.force_authenticate = force_authenticate
+        self.request = Request(self.factory.get(
+            '/api/recipes/', {'recipes_limit': 3}
+        ))
+        self.request.user = self.user
+        self.recipe = Recipe.objects.filter(author=self.user).first()
+        ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)[:args.ingredients]
+        )
+        self.payload = {
+            'ingredients': [
+                {'id': ingredient_id, 'amount': number + 1}
+                for number, ingredient_id in enumerate(ingredient_ids)
+            ],
+            'tags': list(Tag.objects.values_list('id', flat=True)[:2]),
+            'image': PNG,
+            'name': 'Рецепт бенчмарка',
+            'text': 'Описание рецепта бенчмарка.',
+            'cooking_time': 30,
+        }
+
+    def get(self, path, params=None):
+        request = self.factory.get(path, params or {})
+        self.force_authenticate(request, self.user)
+        return request
+
+
+@case
+def recipe_list_serializer(env):
+    from api.serializers.recipes import RecipeGETSerializer
+    from recipes.models import Recipe
+
+    def call():
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            'tags', 'ingredient_recipes__ingredient'
+        )[:env.args.page]
+        return RecipeGETSerializer(
+            queryset, many=True, context={'request': env.request}
+        ).data
+
+    return call
+
+
+@case
+def subscriptions_serializer(env):
+    from django.db.models import BooleanField, Value
+
+    from api.serializers.users import SubscribeShowSerializer
+    from users.models import User
+
+    def call():
+        authors = User.objects.filter(
+            authors__subscriber=env.user
+        ).annotate(is_subscribed=Value(True, output_field=BooleanField()))
+        return SubscribeShowSerializer(
+            authors, many=True, context={'request': env.request}
+        ).data
+
+    return call
+
+
+@case
+def recipe_create(env):
+    from api.serializers.recipes import RecipeSerializer
+
+    def create():
+        serializer = RecipeSerializer(
+            data=env.payload, context={'request': env.request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    return rolled_back(create)
+
+
+@case
+def recipe_update(env):
+    from api.serializers.recipes import RecipeSerializer
+    from recipes.models import Recipe
+
+    payload = dict(env.payload, name='Новое название')
+    payload['ingredients'] = payload['ingredients'][1:] + [
+        dict(payload['ingredients'][0], amount=1000)
+    ]
+
+    def update():
+        # Как в запросе: рецепт читается заново, откат не меняет объект.
+        recipe = Recipe.objects.get(pk=env.recipe.pk)
+        serializer = RecipeSerializer(
+            recipe, data=payload, context={'request': env.request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    return rolled_back(update)
+
+
+@case
+def shopping_cart_aggregation(env):
+    from api.utils import shopping_cart_ingredients
+
+    return lambda: list(shopping_cart_ingredients(env.user))
+
+
+@case
+def shopping_cart_pdf(env):
+    from api.utils import create_shopping_cart, shopping_cart_ingredients
+
+    ingredients = list(shopping_cart_ingredients(env.user))
+    return lambda: create_shopping_cart(ingredients)
+
+
+@case
+def download_shopping_cart(env):
+    from api.views.recipes import RecipeViewSet
+
+    view = RecipeViewSet.as_view(
+        {'get': 'download_shopping_cart'}, throttle_classes=()
+    )
+    return lambda: view(env.get('/api/recipes/download_shopping_cart/'))
+
+
+@case
+def ingredient_search(env):
+    from api.views.recipes import IngredientViewSet
+
+    view = IngredientViewSet.as_view({'get': 'list'}, throttle_classes=())
+    return lambda: view(
+        env.get('/api/ingredients/', {'name': 'ингредиент 1'})
+    ).render()
+
+
+@case
+def recipe_list_endpoint(env):
+    from api.views.recipes import RecipeViewSet
+
+    view = RecipeViewSet.as_view({'get': 'list'}, throttle_classes=())
+    return lambda: view(
+        env.get('/api/recipes/', {'limit': env.args.page})
+    ).render()
+
+
+def run_case(name, call, rounds):
+    call()
+    with count_queries() as queries:
+        call()
+    timings = measure(call, rounds)
+    return {
+        'name': name,
+        'rounds': rounds,
+        'min': min(timings),
+        'max': max(timings),
+        'mean': statistics.mean(timings),
+        'median': statistics.median(timings),
+        'stddev': statistics.stdev(timings) if rounds > 1 else 0.0,
+        'queries': queries['queries'],
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    previous = {
+        result['name']: result for result in (previous or {}).get(
+            'benchmarks', ()
+        )
+    }
+    for result in results:
+        line = (
+            f'{result["name"]:<28} median {result["median"] * 1e3:8.2f} ms '
+            f'min {result["min"] * 1e3:8.2f} ms '
+            f'stddev {result["stddev"] * 1e3:7.2f} ms '
+            f'{result["queries"]:4} queries'
+        )
+        old = previous.get(result['name'])
+        if old is not None:
+            change = (result['median'] / old['median'] - 1) * 100
+            line += (
+                f' | was {old["median"] * 1e3:.2f} ms '
+                f'({change:+.1f}%), {old["queries"]} queries'
+            )
+        print(line)
+
+
+def run(args):
+    from django.conf import settings
+    from django.db import connection
+
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-bench-')
+    env = Environment(args)
+    names = [
+        name for name in CASES
+        if not args.k or any(part in name for part in args.k)
+    ]
+    results = [
+        run_case(name, CASES[name](env), args.rounds) for name in names
+    ]
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            previous = json.load(file)
+    print_results(results, previous)
+    if args.json:
+        report = {
+            'commit': commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'params': {
+                key: value for key, value in vars(args).items()
+                if key not in ('json', 'compare')
+            },
+            'benchmarks': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sqlite', action='store_true')
+    parser.add_argument('--recipes', type=int, default=500)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--ingredients', type=int, default=10)
+    parser.add_argument('--page', type=int, default=6)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument(
+        '-k', action='append',
+        help='запускать только случаи, в имени которых есть подстрока'
+    )
+    parser.add_argument('--json', help='файл для сохранения результатов')
+    parser.add_argument('--compare', help='JSON прошлого запуска')
+    args = parser.parse_args()
+    teardown = setup_django(sqlite=args.sqlite)
+    try:
+        run(args)
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches, Tags.database)
+def replica_pin_cache_check(app_configs, **kwargs):
+    """С репликами отметки чтения с основной базы нужны всем процессам."""
+    if not settings.DATABASE_REPLICAS:
+        return []
+    if not isinstance(caches['default'], (DummyCache, LocMemCache)):
+        return []
+    return [Error(
+        'Для реплик (DB_REPLICA_HOSTS) нужен общий для процессов кеш.',
+        hint=(
+            'Укажите CACHE_BACKEND и CACHE_LOCATION: файловый кеш, кеш в '
+            'базе, Memcached или Redis. Иначе после записи другие воркеры '
+            'читают с реплики и пользователь не видит своих изменений.'
+        ),
+        id='foodgram.E001',
+    )]
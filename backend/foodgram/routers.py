@@ -0,0 +1,88 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+# Реплика, выбранная для чтения в текущем запросе.
+current_replica = ContextVar('current_replica', default=None)
+PIN_KEY = 'replica_pin_{}'
+LAG_QUERY = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) '
+    'END'
+)
+_health = {}
+
+
+def pin_to_primary(user_id):
+    """Читать данные пользователя с основной базы после записи."""
+    cache.set(PIN_KEY.format(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(PIN_KEY.format(user_id), False)
+
+
+def check_replica(alias):
+    """Доступность реплики и ее отставание от основной базы."""
+    try:
+        with connections[alias].cursor() as cursor:
+            if connections[alias].vendor != 'postgresql':
+                cursor.execute('SELECT 1')
+                return True
+            cursor.execute(LAG_QUERY)
+            lag, = cursor.fetchone()
+    except DatabaseError:
+        return False
+    return lag is None or lag <= settings.REPLICA_MAX_LAG
+
+
+def replica_healthy(alias):
+    """Результат проверки реплики, повторяемой не чаще интервала."""
+    healthy, checked_at = _health.get(alias, (False, None))
+    now = time.monotonic()
+    if (
+        checked_at is None
+        or now - checked_at > settings.REPLICA_HEALTH_INTERVAL
+    ):
+        healthy = check_replica(alias)
+        _health[alias] = (healthy, now)
+    return healthy
+
+
+def choose_replica():
+    """Случайная исправная реплика или None."""
+    replicas = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if replica_healthy(alias)
+    ]
+    return random.choice(replicas) if replicas else None
+
+
+class ReplicaRouter:
+    """Направляет чтение на реплику, выбранную для запроса.
+
+    Реплику выбирает представление для безопасных запросов. Запись, чтение
+    внутри транзакции и все остальные запросы идут в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = current_replica.get()
+        if replica is None or connections['default'].in_atomic_block:
+            return 'default'
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
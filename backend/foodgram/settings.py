@@ -36,6 +36,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,6 +72,45 @@ DATABASES = {
     }
 }
 
+DATABASE_REPLICAS = []
+for number, host in enumerate(os.getenv('DB_REPLICA_HOSTS', '').split(), 1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'OPTIONS': {'connect_timeout': 2},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+REPLICA_HEALTH_INTERVAL = int(os.getenv('REPLICA_HEALTH_INTERVAL', 5))
+REPLICA_MAX_LAG = int(os.getenv('REPLICA_MAX_LAG', 10))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    'responses': {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'responses'),
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', 60)),
+    },
+    'throttle': {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', 'throttle'),
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -101,6 +141,9 @@ STATIC_ROOT = BASE_DIR / "collected_static"
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_QUARANTINE_ROOT = os.getenv(
+    'MEDIA_QUARANTINE_ROOT', os.path.join(BASE_DIR, 'quarantine')
+)
 
 CSV_FILES_DIR = os.path.join(BASE_DIR, 'data')
 
@@ -117,8 +160,19 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.UserSlidingWindowThrottle',
+        'api.throttling.IPSlidingWindowThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': os.getenv('THROTTLE_USER_RATE', '240/min') or None,
+        'ip': os.getenv('THROTTLE_IP_RATE', '480/min') or None,
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
 }
 
+FAST_READ_PATH = os.getenv('FAST_READ_PATH', 'True').lower() == 'true'
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
@@ -0,0 +1,13 @@
+import os
+
+bind = '0.0.0.0:8000'
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+# Приложение загружается в мастер-процессе один раз, воркеры получают
+# импортированные модули при fork и не тратят время и память на импорт.
+preload_app = True
+
+
+def when_ready(server):
+    """Загрузка reportlab и шрифта списка покупок до запуска воркеров."""
+    from api.utils import pdf_canvas
+    pdf_canvas()
@@ -3,6 +3,7 @@ from django.contrib import admin
 from recipes.constants import LIST_PER_PAGE
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag)
+from recipes.signals import composition_changed
 
 
 @admin.register(Tag)
@@ -32,7 +33,7 @@ class IngredientAdmin(admin.ModelAdmin):
         'measurement_unit'
     )
     empty_value_display = 'значение отсутствует'
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
     list_per_page = LIST_PER_PAGE
     search_fields = ('name',)
 
@@ -42,6 +43,7 @@ class IngredientRecipeInline(admin.TabularInline):
 
     model = IngredientRecipe
     min_num = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
@@ -66,9 +68,20 @@ class RecipeAdmin(admin.ModelAdmin):
 
     empty_value_display = 'значение отсутствует'
     list_editable = ('author',)
-    list_filter = ('author', 'name', 'tags')
+    list_filter = ('tags',)
     list_per_page = LIST_PER_PAGE
+    show_full_result_count = False
     search_fields = ('author__username', 'name')
+    autocomplete_fields = ('author',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related('tags', 'ingredients')
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        composition_changed.send(sender=Recipe, recipe=form.instance)
 
     @admin.display(description='ингредиенты')
     def get_ingredients(self, object):
@@ -82,7 +95,7 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @admin.display(description='Количество добавлений в избранное')
     def count_favorite(self, object):
-        return object.favoritings.count()
+        return object.favorites_count
 
 
 @admin.register(IngredientRecipe)
@@ -97,6 +110,32 @@ class IngredientRecipetAdmin(admin.ModelAdmin):
     )
     empty_value_display = 'значение отсутствует'
     list_per_page = LIST_PER_PAGE
+    show_full_result_count = False
+    list_select_related = ('ingredient', 'recipe')
+    autocomplete_fields = ('ingredient', 'recipe')
+
+    @staticmethod
+    def send_composition_changed(recipe_ids):
+        for recipe in Recipe.objects.filter(id__in=recipe_ids):
+            composition_changed.send(sender=Recipe, recipe=recipe)
+
+    def save_model(self, request, object, form, change):
+        recipe_ids = {object.recipe_id}
+        if change:
+            recipe_ids.update(IngredientRecipe.objects.filter(
+                pk=object.pk
+            ).values_list('recipe_id', flat=True))
+        super().save_model(request, object, form, change)
+        self.send_composition_changed(recipe_ids)
+
+    def delete_model(self, request, object):
+        super().delete_model(request, object)
+        self.send_composition_changed({object.recipe_id})
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe_id', flat=True))
+        super().delete_queryset(request, queryset)
+        self.send_composition_changed(recipe_ids)
 
 
 @admin.register(Favorite)
@@ -111,9 +150,12 @@ class FavoriteAdmin(admin.ModelAdmin):
 
     empty_value_display = 'значение отсутствует'
     list_editable = ('user', 'recipe')
-    list_filter = ('user',)
+    list_filter = ('recipe__tags',)
     search_fields = ('user__username',)
     list_per_page = LIST_PER_PAGE
+    show_full_result_count = False
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(ShoppingCart)
@@ -128,6 +170,9 @@ class ShoppingCartAdmin(admin.ModelAdmin):
 
     empty_value_display = 'значение отсутствует'
     list_editable = ('user', 'recipe')
-    list_filter = ('user',)
+    list_filter = ('recipe__tags',)
     search_fields = ('user__username',)
     list_per_page = LIST_PER_PAGE
+    show_full_result_count = False
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
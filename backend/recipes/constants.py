@@ -8,3 +8,35 @@ MIN_COOKING_TIME = 1
 MAX_COOKING_TIME = 1440
 LENGTH_TEXT = 20
 LIST_PER_PAGE = 10
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_FAVORITE_WEIGHT = 1.0
+TRENDING_SHOPPING_CART_WEIGHT = 0.5
+TRENDING_REFRESH_INTERVAL = 300
+TRENDING_REFRESH_LAG = 600
+INGREDIENT_INDEX_MAX_AGE = 600
+INGREDIENT_INDEX_LOCAL_MAX_AGE = 30
+INGREDIENT_INDEX_MAX_CHANGES = 1000
+INGREDIENT_INDEX_MAX_DIRTY = 1000
+SIMILARITY_PERMUTATIONS = 64
+SIMILARITY_BANDS = 32
+SIMILARITY_MAX_CANDIDATES = 500
+SIMILARITY_TIME_BUDGET = 0.05
+SIMILAR_RECIPES_LIMIT = 6
+SIMILAR_RECIPES_MAX_LIMIT = 50
+FEED_FANOUT_MAX_SUBSCRIBERS = 1000
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_BACKFILL_RECIPES = 50
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+MEDIA_SWEEP_BATCH_SIZE = 500
+MEDIA_SWEEP_MIN_AGE = 3600
+MEDIA_SWEEP_INTERVAL = 3600
+RELATIONS_CACHE_TIMEOUT = 86400
+COUNT_CACHE_TIMEOUT = 30
+TAG_SLUGS_CACHE_TIMEOUT = 300
+APPROXIMATE_COUNT_THRESHOLD = 100000
+PROFILE_SAMPLE_INTERVAL = 0.001
+PROFILE_MAX_QUERIES = 1000
+PROFILE_SUMMARY_LINES = 40
+BULK_RECIPES_MAX = 500
+BULK_IMAGE_WORKERS = 4
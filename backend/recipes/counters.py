@@ -0,0 +1,67 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно изменяет счетчик объекта на delta."""
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def move_counter(model, old_pk, new_pk, field):
+    """Переносит единицу счетчика с объекта old_pk на new_pk."""
+    change_counter(model, old_pk, field, -1)
+    change_counter(model, new_pk, field, 1)
+
+
+def remember_moved(instance, fields, using, update_fields=None):
+    """Запоминает прежние значения измененных внешних ключей объекта.
+
+    Вызывается в pre_save: значения читаются из базы и сохраняются в
+    instance._moved как {attname: прежнее значение} для обработчиков
+    post_save.
+    """
+    instance._moved = {}
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    attnames = [instance._meta.get_field(field).attname for field in fields]
+    if not attnames:
+        return
+    row = type(instance)._base_manager.using(using).filter(
+        pk=instance.pk
+    ).values(*attnames).first()
+    instance._moved = {
+        attname: value for attname, value in (row or {}).items()
+        if getattr(instance, attname) != value
+    }
+
+
+def count_subquery(model, field):
+    """Подзапрос количества строк model, ссылающихся на объект."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+
+
+def recount_counters():
+    """Пересчитывает все денормализованные счетчики."""
+    Recipe.objects.update(
+        favorites_count=count_subquery(Favorite, 'recipe'),
+        shopping_cart_count=count_subquery(ShoppingCart, 'recipe')
+    )
+    User.objects.update(
+        recipes_count=count_subquery(Recipe, 'author'),
+        subscribers_count=count_subquery(Subscribe, 'author')
+    )
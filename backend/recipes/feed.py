@@ -0,0 +1,136 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from recipes.constants import (FEED_BACKFILL_RECIPES, FEED_FANOUT_BATCH_SIZE,
+                               FEED_FANOUT_MAX_SUBSCRIBERS)
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed')
+
+
+def run_in_background(function, *args):
+    """Выполняет функцию в фоновом потоке после коммита транзакции."""
+    def task():
+        try:
+            function(*args)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: _executor.submit(task))
+
+
+def fan_out(recipe_id):
+    """Добавляет рецепт в ленты подписчиков автора пачками.
+
+    Новый рецепт сохраняется с флагом feed_pending, рассылка снимает его
+    после записи всех пачек. Если процесс остановился до рассылки, рецепт
+    остается помеченным и рассылается командой fanout_feed.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).values(
+        'author_id', 'pub_date', 'author__subscribers_count'
+    ).first()
+    if recipe is None:
+        return
+    if recipe['author__subscribers_count'] <= FEED_FANOUT_MAX_SUBSCRIBERS:
+        insert_entries(recipe_id, recipe)
+    Recipe.objects.filter(id=recipe_id, feed_pending=True).update(
+        feed_pending=False
+    )
+
+
+def insert_entries(recipe_id, recipe):
+    """Записывает рецепт в ленты подписчиков автора."""
+    subscribers = Subscribe.objects.filter(
+        author_id=recipe['author_id']
+    ).order_by().values_list('subscriber_id', flat=True)
+    batch = []
+    for subscriber_id in subscribers.iterator(
+        chunk_size=FEED_FANOUT_BATCH_SIZE
+    ):
+        batch.append(FeedEntry(
+            user_id=subscriber_id,
+            recipe_id=recipe_id,
+            pub_date=recipe['pub_date']
+        ))
+        if len(batch) == FEED_FANOUT_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def pending_recipes():
+    """Id рецептов, рассылка которых не была выполнена."""
+    return Recipe.objects.filter(feed_pending=True).order_by(
+        'pub_date'
+    ).values_list('id', flat=True)
+
+
+def backfill(subscriber_id, author_id):
+    """Добавляет в ленту нового подписчика последние рецепты автора."""
+    recipes = Recipe.objects.filter(
+        author_id=author_id,
+        author__subscribers_count__lte=FEED_FANOUT_MAX_SUBSCRIBERS
+    ).order_by('-pub_date').values_list(
+        'id', 'pub_date'
+    )[:FEED_BACKFILL_RECIPES]
+    FeedEntry.objects.bulk_create([
+        FeedEntry(user_id=subscriber_id, recipe_id=recipe_id, pub_date=date)
+        for recipe_id, date in recipes
+    ], ignore_conflicts=True)
+
+
+def remove(subscriber_id, author_id):
+    """Убирает рецепты автора из ленты бывшего подписчика."""
+    FeedEntry.objects.filter(
+        user_id=subscriber_id, recipe__author_id=author_id
+    ).delete()
+
+
+def keyset_page(queryset, date_field, id_field, position, reverse, limit):
+    """Ключи (дата, id) выборки после позиции в порядке ленты."""
+    if reverse:
+        order = (date_field, id_field)
+        lookup = 'gt'
+    else:
+        order = (f'-{date_field}', f'-{id_field}')
+        lookup = 'lt'
+    if position is not None:
+        date, object_id = position
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__{lookup}': date})
+            | Q(**{date_field: date, f'{id_field}__{lookup}': object_id})
+        )
+    return queryset.order_by(*order).values_list(
+        date_field, id_field
+    )[:limit]
+
+
+def feed_timeline(user, position, reverse, limit):
+    """Страница ленты подписок: ключи (pub_date, id рецепта).
+
+    Записи ленты читаются по индексу feed_entry_user_idx, рецепты авторов с
+    большим числом подписчиков - по индексу recipe_author_idx. Обе выборки
+    ограничены limit и сливаются по ключу. Ключи идут от новых к старым,
+    при reverse - от старых к новым после позиции.
+    """
+    popular_authors = list(Subscribe.objects.filter(
+        subscriber=user,
+        author__subscribers_count__gt=FEED_FANOUT_MAX_SUBSCRIBERS
+    ).values_list('author_id', flat=True))
+    entries = FeedEntry.objects.filter(user=user)
+    if popular_authors:
+        entries = entries.exclude(recipe__author_id__in=popular_authors)
+    sources = [keyset_page(
+        entries, 'pub_date', 'recipe_id', position, reverse, limit
+    )]
+    if popular_authors:
+        sources.append(keyset_page(
+            Recipe.objects.filter(author_id__in=popular_authors),
+            'pub_date', 'id', position, reverse, limit
+        ))
+    return list(islice(heapq.merge(*sources, reverse=not reverse), limit))
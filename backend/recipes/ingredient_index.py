@@ -0,0 +1,184 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.constants import (INGREDIENT_INDEX_LOCAL_MAX_AGE,
+                               INGREDIENT_INDEX_MAX_AGE,
+                               INGREDIENT_INDEX_MAX_CHANGES,
+                               INGREDIENT_INDEX_MAX_DIRTY)
+from recipes.models import IngredientRecipe
+from recipes.shared_cache import is_shared
+
+VERSION_KEY = 'ingredient_index_version'
+CHANGES_KEY = 'ingredient_index_changes:{}'
+# Запись журнала, требующая перестроить индекс целиком.
+REBUILD = 'rebuild'
+
+
+class IngredientIndex:
+    """Инвертированный индекс: ингредиент -> отсортированные id рецептов.
+
+    Индекс живет в памяти процесса и строится одним запросом при первом
+    обращении. После коммита изменения рецептов записываются в журнал в
+    кеше: номер версии увеличивается атомарным incr, а под ключом версии
+    сохраняются id измененных рецептов. Перед поиском процесс читает
+    записи журнала после своей версии и переиндексирует только эти
+    рецепты. При слишком большом отставании и после invalidate индекс
+    строится заново. Если кеш не общий для процессов, изменения из
+    других процессов видны только после перестроения индекса по возрасту.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._recipes = {}
+        self._version = None
+        self._built_at = None
+
+    def _add(self, recipe_id, ingredient_ids):
+        self._recipes[recipe_id] = ingredient_ids
+        for ingredient_id in ingredient_ids:
+            insort(
+                self._postings.setdefault(ingredient_id, array('q')),
+                recipe_id
+            )
+
+    def _remove(self, recipe_id):
+        for ingredient_id in self._recipes.pop(recipe_id, ()):
+            postings = self._postings[ingredient_id]
+            position = bisect_left(postings, recipe_id)
+            if position < len(postings) and postings[position] == recipe_id:
+                del postings[position]
+
+    def _build(self, version):
+        postings = {}
+        recipes = {}
+        rows = IngredientRecipe.objects.order_by(
+            'ingredient_id', 'recipe_id'
+        ).values_list('ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows.iterator(chunk_size=10000):
+            postings.setdefault(ingredient_id, array('q')).append(recipe_id)
+            recipes.setdefault(recipe_id, []).append(ingredient_id)
+        self._postings = postings
+        self._recipes = {
+            recipe_id: tuple(ingredient_ids)
+            for recipe_id, ingredient_ids in recipes.items()
+        }
+        self._version = version
+        self._built_at = time.monotonic()
+
+    def _reindex(self, recipe_ids):
+        current = {}
+        for recipe_id, ingredient_id in IngredientRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            current.setdefault(recipe_id, []).append(ingredient_id)
+        for recipe_id in recipe_ids:
+            self._remove(recipe_id)
+            if recipe_id in current:
+                self._add(recipe_id, tuple(current[recipe_id]))
+
+    def _changes(self, version):
+        """Рецепты, измененные после версии индекса, и новая версия.
+
+        Записи читаются по порядку до первой отсутствующей: она еще не
+        сохранена процессом, который увеличил версию, и будет прочитана при
+        следующем поиске. Возвращает None, если индекс нужно перестроить.
+        """
+        if version - self._version > INGREDIENT_INDEX_MAX_CHANGES:
+            return None
+        numbers = range(self._version + 1, version + 1)
+        entries = cache.get_many(
+            [CHANGES_KEY.format(number) for number in numbers]
+        )
+        recipe_ids = set()
+        applied = self._version
+        for number in numbers:
+            entry = entries.get(CHANGES_KEY.format(number))
+            if entry is None:
+                break
+            if entry == REBUILD:
+                return None
+            recipe_ids.update(entry)
+            applied = number
+        return recipe_ids, applied
+
+    def _ensure_fresh(self):
+        version = cache.get(VERSION_KEY, 0)
+        max_age = (
+            INGREDIENT_INDEX_MAX_AGE if is_shared(cache)
+            else INGREDIENT_INDEX_LOCAL_MAX_AGE
+        )
+        if (
+            self._built_at is None
+            or time.monotonic() - self._built_at > max_age
+            or version < self._version
+        ):
+            self._build(version)
+            return
+        if version == self._version:
+            return
+        changes = self._changes(version)
+        if changes is None:
+            self._build(version)
+            return
+        recipe_ids, self._version = changes
+        if recipe_ids:
+            self._reindex(recipe_ids)
+
+    def _publish(self, entry):
+        cache.add(VERSION_KEY, 0, None)
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            return
+        cache.set(
+            CHANGES_KEY.format(version), entry, 2 * INGREDIENT_INDEX_MAX_AGE
+        )
+
+    def mark_dirty(self, recipe_ids):
+        """Записывает рецепты в журнал изменений после коммита транзакции.
+
+        Слишком большой набор рецептов, например при импорте, вместо
+        журнала перестраивает индекс целиком.
+        """
+        recipe_ids = list(recipe_ids)
+        entry = (
+            recipe_ids if len(recipe_ids) <= INGREDIENT_INDEX_MAX_DIRTY
+            else REBUILD
+        )
+        transaction.on_commit(lambda: self._publish(entry))
+
+    def invalidate(self):
+        """Перестраивает индекс во всех процессах после коммита транзакции."""
+        transaction.on_commit(lambda: self._publish(REBUILD))
+
+    def search(self, ingredient_ids, max_missing=None):
+        """Рецепты с указанными ингредиентами, лучшие по покрытию первыми.
+
+        Возвращает список кортежей (id рецепта, найдено, не хватает).
+        """
+        with self._lock:
+            self._ensure_fresh()
+            matched = Counter()
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self._postings.get(ingredient_id, ()))
+            results = []
+            for recipe_id, count in matched.items():
+                missing = len(self._recipes[recipe_id]) - count
+                if max_missing is None or missing <= max_missing:
+                    results.append((recipe_id, count, missing))
+        results.sort(
+            key=lambda item: (
+                -item[1] / (item[1] + item[2]), item[2], -item[0]
+            )
+        )
+        return results
+
+
+ingredient_index = IngredientIndex()
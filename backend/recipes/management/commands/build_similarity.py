@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.similarity import update_signatures
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Пересчет сигнатур для поиска похожих рецептов'
+
+    def handle(self, *args, **kwargs):
+        recipe_ids = Recipe.objects.order_by('id').values_list(
+            'id', flat=True
+        )
+        batch = []
+        total = 0
+        for recipe_id in recipe_ids.iterator(chunk_size=BATCH_SIZE):
+            batch.append(recipe_id)
+            if len(batch) == BATCH_SIZE:
+                update_signatures(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            update_signatures(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Сигнатуры пересчитаны для {total} рецептов'
+        ))
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.constants import EXPORT_CHUNK_SIZE
+from recipes.ndjson import export_recipes
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка рецептов в формате NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки, по умолчанию стандартный вывод'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за один раз'
+        )
+
+    def handle(self, *args, **options):
+        output = (
+            sys.stdout if options['output'] == '-'
+            else open(options['output'], 'w', encoding='utf-8')
+        )
+        total = 0
+        try:
+            for line in export_recipes(options['chunk_size']):
+                output.write(line)
+                total += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено строк: {total}'
+        ))
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.feed import fan_out, pending_recipes
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылка в ленты подписчиков рецептов, ожидающих рассылки, '
+        'или всех рецептов за последние дни'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Разослать все рецепты за указанное число последних дней'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] is None:
+            recipe_ids = pending_recipes()
+        else:
+            recipe_ids = Recipe.objects.filter(
+                pub_date__gte=timezone.now() - timedelta(days=options['days'])
+            ).values_list('id', flat=True)
+        total = 0
+        for recipe_id in recipe_ids.iterator():
+            fan_out(recipe_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Разослано рецептов: {total}'
+        ))
@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.constants import IMPORT_BATCH_SIZE
+from recipes.ndjson import RecipeImporter
+
+
+class Command(BaseCommand):
+    help = 'Пакетная загрузка рецептов из файла NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл выгрузки, по умолчанию стандартный ввод'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество рецептов в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        source = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8')
+        )
+        try:
+            stats = RecipeImporter(options['batch_size']).run(source)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {stats["recipes_imported"]}, '
+            f'пропущено: {stats["recipes_skipped"]}, '
+            f'создано тегов: {stats["tag_created"]}, '
+            f'ингредиентов: {stats["ingredient_created"]}, '
+            f'авторов: {stats["user_created"]}'
+        ))
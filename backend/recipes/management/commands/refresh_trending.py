@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.constants import TRENDING_REFRESH_INTERVAL
+from recipes.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Обновление рейтинга популярных рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать рейтинг заново по всем добавлениям'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Обновлять рейтинг периодически'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=TRENDING_REFRESH_INTERVAL,
+            help='Интервал обновления в секундах для режима --loop'
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            updated = refresh_trending(full=full)
+            self.stdout.write(self.style.SUCCESS(
+                f'Рейтинг обновлен, изменено строк: {updated}'
+            ))
+            if not options['loop']:
+                break
+            full = False
+            time.sleep(options['interval'])
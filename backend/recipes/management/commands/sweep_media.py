@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.constants import (MEDIA_SWEEP_BATCH_SIZE, MEDIA_SWEEP_INTERVAL,
+                               MEDIA_SWEEP_MIN_AGE)
+from recipes.media_sweeper import MediaSweeper
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать найденные файлы'
+        )
+        parser.add_argument(
+            '--quarantine',
+            action='store_true',
+            help='Переносить файлы в MEDIA_QUARANTINE_ROOT вместо удаления'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=MEDIA_SWEEP_BATCH_SIZE,
+            help='Количество файлов, проверяемых одним запросом'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Сколько пачек обработать за запуск'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=MEDIA_SWEEP_MIN_AGE,
+            help='Не трогать файлы моложе указанного числа секунд'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Повторять проверку периодически'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=MEDIA_SWEEP_INTERVAL,
+            help='Интервал проверки в секундах для режима --loop'
+        )
+
+    def handle(self, *args, **options):
+        sweeper = MediaSweeper(
+            batch_size=options['batch_size'],
+            min_age=options['min_age'],
+            quarantine=options['quarantine'],
+            dry_run=options['dry_run']
+        )
+        while True:
+            report = sweeper.sweep(options['max_batches'])
+            if options['dry_run']:
+                for name, size in report['orphans']:
+                    self.stdout.write(f'{name}\t{size}')
+            action = (
+                'найдено' if options['dry_run']
+                else 'перенесено' if options['quarantine'] else 'удалено'
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Проверено файлов: {report["scanned"]}, {action}: '
+                f'{len(report["orphans"])} ({report["bytes"]} байт)'
+                + ('' if report['finished'] else ', проверка не завершена')
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,116 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+from recipes.constants import MEDIA_SWEEP_BATCH_SIZE, MEDIA_SWEEP_MIN_AGE
+from recipes.models import Recipe
+
+IMAGE_FIELD = Recipe._meta.get_field('image')
+CHECKPOINT_NAME = '.sweep_checkpoint'
+
+
+class MediaSweeper:
+    """Поиск и удаление файлов изображений, на которые не ссылаются рецепты.
+
+    Файлы каталога загрузки обходятся пачками в порядке имен. После каждой
+    пачки имя последнего файла сохраняется в файл контрольной точки в
+    MEDIA_QUARANTINE_ROOT (MEDIA_ROOT раздается наружу), и следующий запуск
+    продолжает с него. Файлы моложе min_age пропускаются, чтобы не задеть
+    изображения рецептов, которые еще сохраняются.
+    """
+
+    def __init__(self, batch_size=MEDIA_SWEEP_BATCH_SIZE,
+                 min_age=MEDIA_SWEEP_MIN_AGE, quarantine=False,
+                 dry_run=False, checkpoint=None):
+        self.storage = IMAGE_FIELD.storage
+        self.directory = IMAGE_FIELD.upload_to.rstrip('/')
+        self.batch_size = batch_size
+        self.min_age = timedelta(seconds=min_age)
+        self.quarantine = quarantine and FileSystemStorage(
+            location=settings.MEDIA_QUARANTINE_ROOT
+        )
+        self.dry_run = dry_run
+        self.checkpoint = checkpoint or os.path.join(
+            settings.MEDIA_QUARANTINE_ROOT, CHECKPOINT_NAME
+        )
+        self.legacy_checkpoint = None if checkpoint else os.path.join(
+            settings.MEDIA_ROOT, CHECKPOINT_NAME
+        )
+
+    def read_checkpoint(self):
+        for path in (self.checkpoint, self.legacy_checkpoint):
+            if path is None:
+                continue
+            try:
+                with open(path, encoding='utf-8') as file:
+                    return file.read().strip()
+            except FileNotFoundError:
+                pass
+        return ''
+
+    def write_checkpoint(self, name):
+        if self.dry_run:
+            return
+        os.makedirs(os.path.dirname(self.checkpoint), exist_ok=True)
+        with open(self.checkpoint, 'w', encoding='utf-8') as file:
+            file.write(name)
+        # Прежняя контрольная точка в MEDIA_ROOT была доступна снаружи.
+        if self.legacy_checkpoint and os.path.exists(self.legacy_checkpoint):
+            os.remove(self.legacy_checkpoint)
+
+    def pending_names(self):
+        if not self.storage.exists(self.directory):
+            return []
+        last = self.read_checkpoint()
+        _, files = self.storage.listdir(self.directory)
+        return sorted(
+            f'{self.directory}/{file}' for file in files
+            if f'{self.directory}/{file}' > last
+        )
+
+    def orphans(self, names):
+        """Файлы пачки без рецептов, одним запросом к базе."""
+        referenced = set(Recipe.objects.filter(
+            image__in=names
+        ).values_list('image', flat=True))
+        threshold = timezone.now() - self.min_age
+        return [
+            name for name in names
+            if name not in referenced
+            and self.storage.get_modified_time(name) < threshold
+        ]
+
+    def remove(self, name):
+        if self.quarantine:
+            with self.storage.open(name) as file:
+                self.quarantine.save(name, file)
+        self.storage.delete(name)
+
+    def sweep(self, max_batches=None):
+        """Обрабатывает до max_batches пачек и возвращает отчет.
+
+        В отчете: scanned, orphans (список пар имя и размер), bytes и
+        finished - пройден ли каталог до конца.
+        """
+        names = self.pending_names()
+        report = {'scanned': 0, 'orphans': [], 'bytes': 0, 'finished': False}
+        for batch_number, start in enumerate(
+            range(0, len(names), self.batch_size)
+        ):
+            if max_batches is not None and batch_number >= max_batches:
+                return report
+            batch = names[start:start + self.batch_size]
+            for name in self.orphans(batch):
+                size = self.storage.size(name)
+                report['orphans'].append((name, size))
+                report['bytes'] += size
+                if not self.dry_run:
+                    self.remove(name)
+            report['scanned'] += len(batch)
+            self.write_checkpoint(batch[-1])
+        self.write_checkpoint('')
+        report['finished'] = True
+        return report
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingCursor',
+            fields=[
+                ('source', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='Источник')),
+                ('since', models.DateTimeField(null=True, verbose_name='Последнее учтенное добавление')),
+                ('seen', models.JSONField(default=list, verbose_name='Учтенные добавления в окне перекрытия')),
+            ],
+            options={
+                'verbose_name': 'Позиция обновления рейтинга',
+                'verbose_name_plural': 'Позиции обновления рейтинга',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_feed_keyset'),
+    ]
+
+    operations = [
+        # Уже опубликованные рецепты разосланы, новые ждут рассылки.
+        migrations.AddField(
+            model_name='recipe',
+            name='feed_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Ожидает рассылки в ленты'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='feed_pending',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Ожидает рассылки в ленты'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('feed_pending', True)), fields=['pub_date'], name='recipe_feed_pending_idx'),
+        ),
+    ]
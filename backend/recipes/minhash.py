@@ -0,0 +1,59 @@
+import hashlib
+import random
+from array import array
+
+from recipes.constants import SIMILARITY_BANDS, SIMILARITY_PERMUTATIONS
+
+PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+ROWS_PER_BAND = SIMILARITY_PERMUTATIONS // SIMILARITY_BANDS
+
+_random = random.Random(20240401)
+PERMUTATIONS = tuple(
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(SIMILARITY_PERMUTATIONS)
+)
+
+
+def features(ingredient_ids, tag_ids):
+    """Множество признаков рецепта: ингредиенты и теги без пересечений."""
+    return (
+        {2 * ingredient_id for ingredient_id in ingredient_ids}
+        | {2 * tag_id + 1 for tag_id in tag_ids}
+    )
+
+
+def signature(recipe_features):
+    """MinHash-сигнатура множества признаков."""
+    if not recipe_features:
+        return array('I', [MAX_HASH] * SIMILARITY_PERMUTATIONS)
+    return array('I', (
+        min((a * feature + b) % PRIME for feature in recipe_features)
+        & MAX_HASH
+        for a, b in PERMUTATIONS
+    ))
+
+
+def signature_from_bytes(data):
+    result = array('I')
+    result.frombytes(bytes(data))
+    return result
+
+
+def bands(recipe_signature):
+    """Пары (номер полосы, корзина) для LSH по полосам сигнатуры."""
+    result = []
+    for band in range(SIMILARITY_BANDS):
+        chunk = recipe_signature[
+            band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND
+        ]
+        digest = hashlib.blake2b(chunk.tobytes(), digest_size=8).digest()
+        result.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return result
+
+
+def similarity(first, second):
+    """Оценка коэффициента Жаккара по двум сигнатурам."""
+    return sum(
+        1 for left, right in zip(first, second) if left == right
+    ) / SIMILARITY_PERMUTATIONS
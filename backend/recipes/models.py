@@ -129,11 +129,41 @@ class Recipe(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    favorites_count = models.PositiveIntegerField(
+        'Количество добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'Количество добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+    feed_pending = models.BooleanField(
+        'Ожидает рассылки в ленты',
+        default=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-favorites_count', '-pub_date'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_idx'
+            ),
+            models.Index(
+                fields=['pub_date'],
+                name='recipe_feed_pending_idx',
+                condition=models.Q(feed_pending=True)
+            )
+        ]
 
     def __str__(self):
         return self.name[:LENGTH_TEXT]
@@ -205,6 +235,11 @@ class Favorite(models.Model):
         related_name='favoritings',
         help_text='Выберите рецепт'
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Избранный рецепт'
@@ -238,6 +273,11 @@ class ShoppingCart(models.Model):
         related_name='shopping_carts',
         help_text='Выберите рецепт для списка покупок'
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -252,3 +292,143 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'Рецепт {self.recipe} в списке покупок у {self.user}'
+
+
+class RecipeRanking(models.Model):
+    """Модель рейтинга рецепта для ленты популярного."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking'
+    )
+    score = models.FloatField(
+        'Рейтинг',
+        db_index=True
+    )
+    last_event = models.DateTimeField(
+        'Последнее учтенное добавление',
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        ordering = ('-score',)
+
+    def __str__(self):
+        return f'Рейтинг рецепта {self.recipe}: {self.score:.2f}'
+
+
+class TrendingCursor(models.Model):
+    """Модель позиции обновления рейтинга по источнику добавлений."""
+
+    source = models.CharField(
+        'Источник',
+        max_length=MAX_LENGTH,
+        primary_key=True
+    )
+    since = models.DateTimeField(
+        'Последнее учтенное добавление',
+        null=True
+    )
+    seen = models.JSONField(
+        'Учтенные добавления в окне перекрытия',
+        default=list
+    )
+
+    class Meta:
+        verbose_name = 'Позиция обновления рейтинга'
+        verbose_name_plural = 'Позиции обновления рейтинга'
+
+    def __str__(self):
+        return f'{self.source}: {self.since}'
+
+
+class RecipeSignature(models.Model):
+    """Модель MinHash-сигнатуры рецепта для поиска похожих рецептов."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature'
+    )
+    signature = models.BinaryField('Сигнатура')
+
+    class Meta:
+        verbose_name = 'Сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+
+    def __str__(self):
+        return f'Сигнатура рецепта {self.recipe}'
+
+
+class RecipeBucket(models.Model):
+    """Модель корзины LSH, в которую попадает полоса сигнатуры рецепта."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='buckets'
+    )
+    band = models.PositiveSmallIntegerField('Полоса')
+    bucket = models.BigIntegerField('Корзина')
+
+    class Meta:
+        verbose_name = 'Корзина похожих рецептов'
+        verbose_name_plural = 'Корзины похожих рецептов'
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='recipe_bucket_idx')
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'band'],
+                name='unique_recipe_band'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe}: полоса {self.band}'
+
+
+class FeedEntry(models.Model):
+    """Модель записи в ленте подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_entry_user_idx'
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+
+    def __str__(self):
+        return f'Рецепт {self.recipe} в ленте у {self.user}'
@@ -0,0 +1,275 @@
+"""Потоковый экспорт и импорт рецептов в формате NDJSON.
+
+Каждая строка - отдельный объект с полем type. Сначала идут справочники
+(tag, ingredient, user), затем рецепты со ссылками на их id в исходной
+базе. При импорте справочники сопоставляются по естественным ключам
+(слаг тега, название и единица измерения ингредиента, email автора), а
+рецепты получают новые id. Файлы изображений переносятся отдельно,
+в выгрузке хранятся только их пути в хранилище.
+"""
+import csv
+import io
+import json
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from recipes.constants import EXPORT_CHUNK_SIZE, IMPORT_BATCH_SIZE
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from recipes.signals import recipes_imported
+from users.models import User
+
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+USER_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name')
+RECIPE_FIELDS = (
+    'id', 'author_id', 'name', 'image', 'text', 'cooking_time', 'pub_date'
+)
+RecipeTag = Recipe.tags.through
+
+
+def dumps(record):
+    return json.dumps(
+        record, ensure_ascii=False, cls=DjangoJSONEncoder
+    ) + '\n'
+
+
+class RelatedRows:
+    """Строки связанной таблицы, сгруппированные по возрастающему recipe_id.
+
+    Выборка идет одним серверным курсором параллельно с рецептами, поэтому
+    в памяти находится только группа текущего рецепта.
+    """
+
+    def __init__(self, queryset, fields, chunk_size):
+        rows = queryset.order_by('recipe_id', 'id').values_list(
+            'recipe_id', *fields
+        ).iterator(chunk_size=chunk_size)
+        self.groups = groupby(rows, key=itemgetter(0))
+        self.current = next(self.groups, None)
+
+    def take(self, recipe_id):
+        while self.current is not None and self.current[0] < recipe_id:
+            self.current = next(self.groups, None)
+        if self.current is None or self.current[0] != recipe_id:
+            return []
+        rows = [list(row[1:]) for row in self.current[1]]
+        self.current = next(self.groups, None)
+        return rows
+
+
+def export_recipes(chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки NDJSON со справочниками и рецептами."""
+    references = (
+        ('tag', Tag.objects.all(), TAG_FIELDS),
+        ('ingredient', Ingredient.objects.all(), INGREDIENT_FIELDS),
+        ('user', User.objects.filter(
+            id__in=Recipe.objects.values('author_id')
+        ), USER_FIELDS),
+    )
+    for record_type, queryset, fields in references:
+        for row in queryset.order_by('id').values(*fields).iterator(
+            chunk_size=chunk_size
+        ):
+            yield dumps({'type': record_type, **row})
+    tags = RelatedRows(RecipeTag.objects.all(), ('tag_id',), chunk_size)
+    ingredients = RelatedRows(
+        IngredientRecipe.objects.all(), ('ingredient_id', 'amount'),
+        chunk_size
+    )
+    for row in Recipe.objects.order_by('id').values(
+        *RECIPE_FIELDS
+    ).iterator(chunk_size=chunk_size):
+        yield dumps({
+            'type': 'recipe',
+            **row,
+            'tags': [tag_id for tag_id, in tags.take(row['id'])],
+            'ingredients': ingredients.take(row['id']),
+        })
+
+
+def copy_rows(cursor, model, fields, rows):
+    """Вставка строк командой COPY (только PostgreSQL)."""
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(model._meta.get_field(field).column) for field in fields
+    )
+    cursor.copy_expert(
+        f'COPY {quote(model._meta.db_table)} ({columns}) '
+        'FROM STDIN WITH (FORMAT csv)',
+        buffer
+    )
+
+
+class RecipeImporter:
+    """Пакетный импорт строк NDJSON с переназначением id."""
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == 'postgresql'
+        self.ids = {'tag': {}, 'ingredient': {}, 'user': {}}
+        self.pending = {record_type: [] for record_type in self.ids}
+        self.recipes = []
+        self.stats = Counter()
+
+    def run(self, lines):
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record_type = record.pop('type')
+            if record_type == 'recipe':
+                self.flush_references()
+                self.recipes.append(record)
+                if len(self.recipes) >= self.batch_size:
+                    self.flush_recipes()
+            else:
+                self.pending[record_type].append(record)
+                if len(self.pending[record_type]) >= self.batch_size:
+                    self.flush_references()
+        self.flush_references()
+        self.flush_recipes()
+        return self.stats
+
+    def resolve(self, record_type, records, model, key, fields, defaults=None):
+        """Сопоставляет исходные id с существующими или созданными."""
+        def natural_key(item):
+            return tuple(item[field] for field in key)
+
+        by_key = {natural_key(record): record['id'] for record in records}
+
+        def existing():
+            first = key[0]
+            return model.objects.filter(**{
+                f'{first}__in': {record[first] for record in records}
+            }).values('id', *key)
+
+        found = {natural_key(row): row['id'] for row in existing()}
+        missing = [
+            model(**{field: record[field] for field in fields}, **(
+                defaults or {}
+            ))
+            for record in records if natural_key(record) not in found
+        ]
+        if missing:
+            model.objects.bulk_create(missing, ignore_conflicts=True)
+            created = len(found)
+            found = {natural_key(row): row['id'] for row in existing()}
+            self.stats[f'{record_type}_created'] += len(found) - created
+        for item_key, old_id in by_key.items():
+            if item_key in found:
+                self.ids[record_type][old_id] = found[item_key]
+
+    def flush_references(self):
+        references = (
+            ('tag', Tag, ('slug',), TAG_FIELDS[1:], None),
+            ('ingredient', Ingredient, ('name', 'measurement_unit'),
+             INGREDIENT_FIELDS[1:], None),
+            ('user', User, ('email',), USER_FIELDS[1:],
+             {'password': make_password(None)}),
+        )
+        for record_type, model, key, fields, defaults in references:
+            records, self.pending[record_type] = self.pending[record_type], []
+            if records:
+                self.resolve(
+                    record_type, records, model, key, fields, defaults
+                )
+
+    def remap(self, record):
+        """Рецепт с id новой базы или None, если ссылки не найдены."""
+        tags = [self.ids['tag'].get(tag_id) for tag_id in record['tags']]
+        ingredients = [
+            (self.ids['ingredient'].get(ingredient_id), amount)
+            for ingredient_id, amount in record['ingredients']
+        ]
+        author = self.ids['user'].get(record['author_id'])
+        if (
+            author is None or None in tags
+            or any(ingredient is None for ingredient, _ in ingredients)
+        ):
+            return None
+        return dict(
+            record, author_id=author, tags=tags, ingredients=ingredients
+        )
+
+    def flush_recipes(self):
+        records = [
+            remapped for remapped in map(self.remap, self.recipes)
+            if remapped is not None
+        ]
+        self.stats['recipes_skipped'] += len(self.recipes) - len(records)
+        self.recipes = []
+        if not records:
+            return
+        with transaction.atomic():
+            if self.use_copy:
+                recipe_ids = self.copy_recipes(records)
+            else:
+                recipe_ids = self.create_recipes(records)
+            recipes_imported.send(
+                sender=Recipe,
+                recipe_ids=recipe_ids,
+                authors=Counter(record['author_id'] for record in records),
+                tag_ids={tag for record in records for tag in record['tags']}
+            )
+        self.stats['recipes_imported'] += len(records)
+
+    def copy_recipes(self, records):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                'FROM generate_series(1, %s)',
+                [Recipe._meta.db_table, len(records)]
+            )
+            recipe_ids = [recipe_id for recipe_id, in cursor.fetchall()]
+            copy_rows(cursor, Recipe, RECIPE_FIELDS + (
+                'favorites_count', 'shopping_cart_count'
+            ), (
+                [recipe_id] + [record[field] for field in RECIPE_FIELDS[1:]]
+                + [0, 0]
+                for recipe_id, record in zip(recipe_ids, records)
+            ))
+            copy_rows(cursor, RecipeTag, ('recipe', 'tag'), (
+                (recipe_id, tag_id)
+                for recipe_id, record in zip(recipe_ids, records)
+                for tag_id in record['tags']
+            ))
+            copy_rows(
+                cursor, IngredientRecipe, ('recipe', 'ingredient', 'amount'),
+                (
+                    (recipe_id, ingredient_id, amount)
+                    for recipe_id, record in zip(recipe_ids, records)
+                    for ingredient_id, amount in record['ingredients']
+                )
+            )
+        return recipe_ids
+
+    def create_recipes(self, records):
+        """Вставка без COPY, сохранение с raw=True не меняет pub_date."""
+        recipes = [
+            Recipe(**{field: record[field] for field in RECIPE_FIELDS[1:]})
+            for record in records
+        ]
+        for recipe in recipes:
+            recipe.save_base(raw=True)
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe_id=recipe.id, tag_id=tag_id)
+            for recipe, record in zip(recipes, records)
+            for tag_id in record['tags']
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe_id=recipe.id, ingredient_id=ingredient_id,
+                amount=amount
+            )
+            for recipe, record in zip(recipes, records)
+            for ingredient_id, amount in record['ingredients']
+        )
+        return [recipe.id for recipe in recipes]
@@ -0,0 +1,134 @@
+from array import array
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import router, transaction
+
+from recipes.constants import RELATIONS_CACHE_TIMEOUT
+from recipes.models import Favorite, ShoppingCart
+from recipes.shared_cache import is_shared
+from users.models import Subscribe
+
+# Вид связи -> (модель, поле пользователя, поле объекта).
+KINDS = {
+    'favorites': (Favorite, 'user_id', 'recipe_id'),
+    'shopping_cart': (ShoppingCart, 'user_id', 'recipe_id'),
+    'subscriptions': (Subscribe, 'subscriber_id', 'author_id'),
+}
+
+
+class UserRelations:
+    """Отсортированные id избранного, списка покупок и подписок."""
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def contains(self, kind, object_id):
+        ids = self.ids[kind]
+        position = bisect_left(ids, object_id)
+        return position < len(ids) and ids[position] == object_id
+
+
+class RelationCache:
+    """Кеш связей пользователя с рецептами и авторами.
+
+    Для каждого пользователя в общем кеше хранится номер версии и запись
+    с массивами id под ключом этой версии. Запись загружается из основной
+    базы при первом обращении. Изменение увеличивает версию атомарным incr
+    и переносит запись на новую версию с учетом изменения, если между
+    чтением и incr версию никто не менял. Иначе запись новой версии
+    отсутствует и будет загружена заново. Если кеш не общий для процессов
+    (LocMem), записи не кешируются и загружаются из базы один раз за
+    запрос, иначе другие воркеры видели бы устаревшие связи.
+    """
+
+    def _version_key(self, user_id):
+        return f'relations_version:{user_id}'
+
+    def _entry_key(self, user_id, version):
+        return f'relations:{user_id}:{version}'
+
+    def _load(self, user_id):
+        entry = {}
+        for kind, (model, user_field, object_field) in KINDS.items():
+            ids = model.objects.using(router.db_for_write(model)).filter(
+                **{user_field: user_id}
+            ).order_by(object_field).values_list(object_field, flat=True)
+            entry[kind] = array('q', ids).tobytes()
+        return entry
+
+    def get(self, user_id):
+        if not is_shared(cache):
+            return self._unpack(self._load(user_id))
+        version = cache.get(self._version_key(user_id), 0)
+        key = self._entry_key(user_id, version)
+        entry = cache.get(key)
+        if entry is None:
+            entry = self._load(user_id)
+            cache.set(key, entry, RELATIONS_CACHE_TIMEOUT)
+        return self._unpack(entry)
+
+    @staticmethod
+    def _unpack(entry):
+        ids = {}
+        for kind, data in entry.items():
+            ids[kind] = array('q')
+            ids[kind].frombytes(data)
+        return UserRelations(ids)
+
+    def for_request(self, request):
+        """Связи пользователя запроса, загружаемые один раз за запрос."""
+        if request is None or not request.user.is_authenticated:
+            return None
+        relations = getattr(request, '_user_relations', None)
+        if relations is None:
+            relations = self.get(request.user.pk)
+            request._user_relations = relations
+        return relations
+
+    def _apply(self, user_id, kind, object_id, added):
+        version_key = self._version_key(user_id)
+        old_version = cache.get(version_key, 0)
+        entry = cache.get(self._entry_key(user_id, old_version))
+        cache.add(version_key, 0, None)
+        version = cache.incr(version_key)
+        if entry is None or version != old_version + 1:
+            return
+        ids = array('q')
+        ids.frombytes(entry[kind])
+        position = bisect_left(ids, object_id)
+        present = position < len(ids) and ids[position] == object_id
+        if added and not present:
+            insort(ids, object_id)
+        elif not added and present:
+            del ids[position]
+        entry[kind] = ids.tobytes()
+        cache.set(
+            self._entry_key(user_id, version), entry, RELATIONS_CACHE_TIMEOUT
+        )
+
+    def update(self, user_id, kind, object_id, added):
+        """Изменяет запись пользователя после коммита транзакции."""
+        if not is_shared(cache):
+            return
+        transaction.on_commit(
+            lambda: self._apply(user_id, kind, object_id, added)
+        )
+
+    def move(self, kind, instance):
+        """Переносит связь строки, у которой изменились внешние ключи.
+
+        Прежние значения берутся из instance._moved, заполненного в
+        pre_save.
+        """
+        _, user_field, object_field = KINDS[kind]
+        user_id = getattr(instance, user_field)
+        object_id = getattr(instance, object_field)
+        self.update(
+            instance._moved.get(user_field, user_id), kind,
+            instance._moved.get(object_field, object_id), False
+        )
+        self.update(user_id, kind, object_id, True)
+
+
+relation_cache = RelationCache()
@@ -0,0 +1,16 @@
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared(cache):
+    """Проверяет, что кеш общий для процессов и его incr атомарен.
+
+    Кеш в памяти процесса не виден другим воркерам, а файловый кеш и кеш в
+    базе выполняют incr как чтение и запись, поэтому версии, которые на нем
+    построены, могут совпасть у двух процессов.
+    """
+    return not isinstance(
+        cache, (DatabaseCache, DummyCache, FileBasedCache, LocMemCache)
+    )
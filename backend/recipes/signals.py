@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from recipes.counters import change_counter, move_counter, remember_moved
+from recipes.feed import fan_out, run_in_background
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.relations import relation_cache
+from recipes.similarity import schedule_update, update_signatures
+from recipes.tags import invalidate_tag_slugs
+from users.models import User
+
+# Отправляется после изменения ингредиентов или тегов рецепта.
+composition_changed = Signal()
+# Отправляется после пакетного импорта рецептов в обход save().
+recipes_imported = Signal()
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_pre_save(sender, instance, using, update_fields, **kwargs):
+    remember_moved(instance, ('author',), using, update_fields)
+
+
+@receiver(pre_save, sender=Favorite)
+@receiver(pre_save, sender=ShoppingCart)
+def relation_pre_save(sender, instance, using, update_fields, **kwargs):
+    remember_moved(instance, ('user', 'recipe'), using, update_fields)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+        run_in_background(fan_out, instance.id)
+    elif 'author_id' in instance._moved:
+        move_counter(
+            User, instance._moved['author_id'], instance.author_id,
+            'recipes_count'
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+    ingredient_index.mark_dirty((instance.id,))
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+        relation_cache.update(
+            instance.user_id, 'favorites', instance.recipe_id, True
+        )
+    elif instance._moved:
+        if 'recipe_id' in instance._moved:
+            move_counter(
+                Recipe, instance._moved['recipe_id'], instance.recipe_id,
+                'favorites_count'
+            )
+        relation_cache.move('favorites', instance)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+    relation_cache.update(
+        instance.user_id, 'favorites', instance.recipe_id, False
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'shopping_cart_count', 1)
+        relation_cache.update(
+            instance.user_id, 'shopping_cart', instance.recipe_id, True
+        )
+    elif instance._moved:
+        if 'recipe_id' in instance._moved:
+            move_counter(
+                Recipe, instance._moved['recipe_id'], instance.recipe_id,
+                'shopping_cart_count'
+            )
+        relation_cache.move('shopping_cart', instance)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'shopping_cart_count', -1)
+    relation_cache.update(
+        instance.user_id, 'shopping_cart', instance.recipe_id, False
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    invalidate_tag_slugs()
+
+
+@receiver(composition_changed, sender=Recipe)
+def recipe_composition_changed(sender, recipe, **kwargs):
+    ingredient_index.mark_dirty((recipe.id,))
+    schedule_update(recipe.id)
+
+
+@receiver(recipes_imported, sender=Recipe)
+def recipes_imported_handler(sender, recipe_ids, authors, **kwargs):
+    for author_id, count in authors.items():
+        change_counter(User, author_id, 'recipes_count', count)
+    ingredient_index.mark_dirty(recipe_ids)
+    transaction.on_commit(lambda: update_signatures(recipe_ids))
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    ingredient_index.invalidate()
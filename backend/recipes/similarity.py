@@ -0,0 +1,111 @@
+import time
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from recipes import minhash
+from recipes.constants import (SIMILARITY_MAX_CANDIDATES,
+                               SIMILARITY_TIME_BUDGET)
+from recipes.feed import run_in_background
+from recipes.models import (IngredientRecipe, Recipe, RecipeBucket,
+                            RecipeSignature)
+
+
+def update_signatures(recipe_ids):
+    """Пересчитывает сигнатуры и корзины LSH для рецептов."""
+    recipe_ids = set(Recipe.objects.filter(
+        id__in=recipe_ids
+    ).values_list('id', flat=True))
+    ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+    tags = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, ingredient_id in IngredientRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'ingredient_id'):
+        ingredients[recipe_id].append(ingredient_id)
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'tag_id'):
+        tags[recipe_id].append(tag_id)
+    signatures = []
+    buckets = []
+    for recipe_id in recipe_ids:
+        signature = minhash.signature(
+            minhash.features(ingredients[recipe_id], tags[recipe_id])
+        )
+        signatures.append(RecipeSignature(
+            recipe_id=recipe_id, signature=signature.tobytes()
+        ))
+        buckets.extend(
+            RecipeBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+            for band, bucket in minhash.bands(signature)
+        )
+    with transaction.atomic():
+        RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeBucket.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSignature.objects.bulk_create(signatures)
+        RecipeBucket.objects.bulk_create(buckets)
+
+
+def schedule_update(recipe_id):
+    """Пересчитывает сигнатуру рецепта в фоне после коммита транзакции."""
+    run_in_background(update_signatures, [recipe_id])
+
+
+def recipe_signature(recipe_id):
+    """Сигнатура рецепта по его ингредиентам и тегам без записи в базу."""
+    return minhash.signature(minhash.features(
+        IngredientRecipe.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', flat=True),
+        Recipe.tags.through.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('tag_id', flat=True)
+    ))
+
+
+def find_similar(recipe, limit):
+    """Похожие рецепты в виде списка пар (id рецепта, сходство).
+
+    Кандидаты берутся из общих с рецептом корзин LSH, начиная с тех, что
+    совпали по большему числу полос. После первых limit кандидатов оценка
+    прекращается, если на нее ушло больше SIMILARITY_TIME_BUDGET секунд;
+    запросы к базе в бюджет не входят. Если сигнатуры рецепта еще нет, она
+    вычисляется в памяти, а запись в базу выполняется в фоне.
+    """
+    row = RecipeSignature.objects.filter(recipe_id=recipe.id).first()
+    if row is None:
+        schedule_update(recipe.id)
+        signature = recipe_signature(recipe.id)
+    else:
+        signature = minhash.signature_from_bytes(row.signature)
+    condition = Q()
+    for band, bucket in minhash.bands(signature):
+        condition |= Q(band=band, bucket=bucket)
+    candidates = list(
+        RecipeBucket.objects.filter(condition).exclude(
+            recipe_id=recipe.id
+        ).values('recipe_id').annotate(
+            hits=Count('id')
+        ).order_by('-hits', '-recipe_id').values_list(
+            'recipe_id', flat=True
+        )[:SIMILARITY_MAX_CANDIDATES]
+    )
+    candidate_signatures = dict(RecipeSignature.objects.filter(
+        recipe_id__in=candidates
+    ).values_list('recipe_id', 'signature'))
+    scores = []
+    started = time.monotonic()
+    for number, recipe_id in enumerate(candidates):
+        if (
+            number >= limit
+            and time.monotonic() - started > SIMILARITY_TIME_BUDGET
+        ):
+            break
+        if recipe_id in candidate_signatures:
+            scores.append((recipe_id, minhash.similarity(
+                signature, minhash.signature_from_bytes(
+                    candidate_signatures[recipe_id]
+                )
+            )))
+    scores.sort(key=lambda item: (-item[1], -item[0]))
+    return scores[:limit]
@@ -0,0 +1,29 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.constants import TAG_SLUGS_CACHE_TIMEOUT
+from recipes.models import Tag
+
+TAG_SLUGS_KEY = 'tag_ids_by_slug'
+
+
+def tag_ids_by_slug(refresh=False):
+    """Соответствие slug -> id всех тегов из кеша.
+
+    Кеш по умолчанию у каждого процесса свой, и сброс после изменения тега
+    виден только процессу, который его выполнил. Поэтому запись живет
+    TAG_SLUGS_CACHE_TIMEOUT, а при refresh загружается из базы заново.
+    """
+    tags = None if refresh else cache.get(TAG_SLUGS_KEY)
+    if tags is None:
+        tags = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(TAG_SLUGS_KEY, tags, TAG_SLUGS_CACHE_TIMEOUT)
+    return tags
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_ids_by_slug()]
+
+
+def invalidate_tag_slugs():
+    transaction.on_commit(lambda: cache.delete(TAG_SLUGS_KEY))
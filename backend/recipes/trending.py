@@ -0,0 +1,125 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.db.models import Max
+
+from recipes.constants import (TRENDING_FAVORITE_WEIGHT,
+                               TRENDING_HALF_LIFE_HOURS,
+                               TRENDING_REFRESH_LAG,
+                               TRENDING_SHOPPING_CART_WEIGHT)
+from recipes.models import (Favorite, Recipe, RecipeRanking, ShoppingCart,
+                            TrendingCursor)
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CHUNK_SIZE = 2000
+REFRESH_LAG = timedelta(seconds=TRENDING_REFRESH_LAG)
+# Источник -> (модель добавлений, вес добавления).
+SOURCES = {
+    'favorites': (Favorite, TRENDING_FAVORITE_WEIGHT),
+    'shopping_cart': (ShoppingCart, TRENDING_SHOPPING_CART_WEIGHT),
+}
+
+
+def event_exponent(created, weight):
+    """Вклад добавления в рейтинг в виде log2(вес * 2^(t / период)).
+
+    Рейтинг хранится как log2 суммы вкладов, отсчитанных от EPOCH, поэтому
+    старые значения не нужно пересчитывать при затухании: порядок рецептов
+    по такому рейтингу совпадает с порядком по затухающей сумме на любой
+    момент времени.
+    """
+    hours = (created - EPOCH).total_seconds() / 3600
+    return math.log2(weight) + hours / TRENDING_HALF_LIFE_HOURS
+
+
+def log2_add(first, second):
+    """Вычисляет log2(2^first + 2^second) без переполнения."""
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def collect_events(model, weight, cursor, scores, last_events):
+    """Собирает вклады добавлений model, еще не учтенных в рейтинге.
+
+    Добавление может попасть в базу позже добавлений с большим created,
+    поэтому просматриваются все добавления начиная с cursor.since за
+    вычетом TRENDING_REFRESH_LAG, а уже учтенные в этом окне пропускаются
+    по id. Курсор сдвигается на последнее добавление.
+    """
+    events = model.objects.order_by()
+    if cursor.since is not None:
+        events = events.filter(created__gte=cursor.since - REFRESH_LAG)
+    latest = events.aggregate(latest=Max('created'))['latest']
+    if latest is None:
+        return
+    if cursor.since is not None:
+        latest = max(latest, cursor.since)
+    window_start = latest - REFRESH_LAG
+    seen = set(cursor.seen)
+    window = []
+    for event_id, recipe_id, created in events.values_list(
+        'id', 'recipe_id', 'created'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        if created >= window_start:
+            window.append(event_id)
+        if event_id in seen:
+            continue
+        scores[recipe_id] = log2_add(
+            scores[recipe_id], event_exponent(created, weight)
+        )
+        if created > last_events.get(recipe_id, EPOCH):
+            last_events[recipe_id] = created
+    cursor.since = latest
+    cursor.seen = window
+
+
+@transaction.atomic
+def refresh_trending(full=False):
+    """Учитывает в рейтинге добавления после последнего обновления."""
+    for source in SOURCES:
+        TrendingCursor.objects.get_or_create(source=source)
+    cursors = TrendingCursor.objects.select_for_update().in_bulk(
+        list(SOURCES)
+    )
+    if full:
+        RecipeRanking.objects.all().delete()
+        for cursor in cursors.values():
+            cursor.since = None
+            cursor.seen = []
+    scores = defaultdict(lambda: None)
+    last_events = {}
+    for source, (model, weight) in SOURCES.items():
+        collect_events(model, weight, cursors[source], scores, last_events)
+    TrendingCursor.objects.bulk_update(cursors.values(), ('since', 'seen'))
+    if not scores:
+        return 0
+    existing = RecipeRanking.objects.in_bulk(list(scores))
+    to_update = []
+    to_create = []
+    for recipe_id, score in scores.items():
+        ranking = existing.get(recipe_id)
+        if ranking is None:
+            to_create.append(RecipeRanking(
+                recipe_id=recipe_id,
+                score=score,
+                last_event=last_events[recipe_id]
+            ))
+            continue
+        ranking.score = log2_add(ranking.score, score)
+        ranking.last_event = max(ranking.last_event, last_events[recipe_id])
+        to_update.append(ranking)
+    RecipeRanking.objects.bulk_update(
+        to_update, ('score', 'last_event'), batch_size=CHUNK_SIZE
+    )
+    alive = set(Recipe.objects.filter(
+        id__in=[ranking.recipe_id for ranking in to_create]
+    ).values_list('id', flat=True))
+    RecipeRanking.objects.bulk_create(
+        [ranking for ranking in to_create if ranking.recipe_id in alive],
+        batch_size=CHUNK_SIZE
+    )
+    return len(to_update) + len(alive)
@@ -20,17 +20,17 @@ class UserAdmin(BaseUserAdmin):
         'count_subscribers'
     )
     empty_value_display = 'значение отсутствует'
-    list_filter = ('username', 'email')
+    list_filter = ('is_staff', 'is_active')
     list_per_page = LIST_PER_PAGE
     search_fields = ('username',)
 
     @admin.display(description='Количество рецептов')
     def count_recipes(self, object):
-        return object.recipes.count()
+        return object.recipes_count
 
     @admin.display(description='Количество подписчиков')
     def count_subscribers(self, object):
-        return object.authors.count()
+        return object.subscribers_count
 
 
 @admin.register(Subscribe)
@@ -44,9 +44,11 @@ class SubscribeAdmin(admin.ModelAdmin):
     )
 
     list_editable = ('author', 'subscriber')
-    list_filter = ('author',)
     list_per_page = LIST_PER_PAGE
+    show_full_result_count = False
     search_fields = ('author__username',)
+    list_select_related = ('author', 'subscriber')
+    autocomplete_fields = ('author', 'subscriber')
 
 
 admin.site.site_title = 'Администрирование Foodgram'
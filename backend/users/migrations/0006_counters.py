@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_auto_20240410_1756'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='subscribe',
+            options={'ordering': ('author',), 'verbose_name': 'Подписка на автора', 'verbose_name_plural': 'Подписки на автора'},
+        ),
+        migrations.AlterModelOptions(
+            name='user',
+            options={'ordering': ('username',), 'verbose_name': 'Пользователь', 'verbose_name_plural': 'Пользователи'},
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+    ]
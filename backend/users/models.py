@@ -55,6 +55,16 @@ class User(AbstractUser):
         max_length=MAX_LENGTH_USER,
         help_text='Введите пароль'
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from recipes import feed
+from recipes.counters import change_counter, move_counter, remember_moved
+from recipes.relations import relation_cache
+from users.models import Subscribe, User
+
+
+@receiver(pre_save, sender=Subscribe)
+def subscribe_pre_save(sender, instance, using, update_fields, **kwargs):
+    remember_moved(instance, ('author', 'subscriber'), using, update_fields)
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'subscribers_count', 1)
+        relation_cache.update(
+            instance.subscriber_id, 'subscriptions', instance.author_id, True
+        )
+        feed.run_in_background(
+            feed.backfill, instance.subscriber_id, instance.author_id
+        )
+    elif instance._moved:
+        if 'author_id' in instance._moved:
+            move_counter(
+                User, instance._moved['author_id'], instance.author_id,
+                'subscribers_count'
+            )
+        relation_cache.move('subscriptions', instance)
+        feed.remove(
+            instance._moved.get('subscriber_id', instance.subscriber_id),
+            instance._moved.get('author_id', instance.author_id)
+        )
+        feed.run_in_background(
+            feed.backfill, instance.subscriber_id, instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'subscribers_count', -1)
+    relation_cache.update(
+        instance.subscriber_id, 'subscriptions', instance.author_id, False
+    )
+    feed.remove(instance.subscriber_id, instance.author_id)